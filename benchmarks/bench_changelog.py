@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end benchmark of Generator.compound_changelog against a
+synthetic repository, served by an in-process fake of GitHub.
+
+    python benchmarks/bench_changelog.py [--tags N] [--issues N]
+        [--pulls N] [--seed N] [--no-memory] [--json FILE]
+        [pygcgen options ...]
+
+    # large repository:
+    python benchmarks/bench_changelog.py --tags 2000 --issues 50000 \\
+        --pulls 30000
+
+Reports the time of each phase, the requests by endpoint and the peak
+memory (traced with tracemalloc, which slows the run down; use
+--no-memory for plain timings). Other options are passed to pygcgen,
+e.g. --events repository, --engine asyncio or
+--max-simultaneous-requests 20.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from pygcgen.generator import Generator  # noqa: E402
+from pygcgen.options_parser import OptionsParser  # noqa: E402
+
+from fake_github import FakeGitHub  # noqa: E402
+from synthetic import PROJECT, USER, SyntheticRepo  # noqa: E402
+
+# phase, object ("generator" or "fetcher") and method
+PHASES = [
+    ("tags", "fetcher", "get_all_tags"),
+    ("tag dates", "generator", "fetch_tags_dates"),
+    ("tag dates", "generator", "sort_tags_by_date"),
+    ("issues", "generator", "fetch_and_filter_issues_and_pr"),
+    ("pull requests", "generator", "filter_merged_pull_requests"),
+    ("events", "generator", "fetch_events_for_issues_and_pr"),
+    ("closed dates", "generator", "detect_actual_closed_dates"),
+    ("filtering", "generator", "bucket_sections"),
+    ("filtering", "generator", "filter_issues_for_tags"),
+    # everything else of compound_changelog
+    ("rendering", "generator", "compound_changelog"),
+]
+
+
+class PhaseTimer(object):
+    """
+    Measures the time spent in methods of the generator and fetcher.
+    A phase doesn't include the time of other phases called from it.
+    """
+
+    def __init__(self):
+        self.times = OrderedDict((name, 0.0) for name, _, _ in PHASES)
+        self.stack = []
+
+    def instrument(self, generator):
+        targets = {"generator": generator, "fetcher": generator.fetcher}
+        for name, target, method in PHASES:
+            obj = targets[target]
+            setattr(obj, method, self.wrap(name, getattr(obj, method)))
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            # [phase, time of nested phases]
+            frame = [name, 0.0]
+            self.stack.append(frame)
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.time() - start
+                self.stack.pop()
+                self.times[name] += elapsed - frame[1]
+                if self.stack:
+                    self.stack[-1][1] += elapsed
+        return timed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark pygcgen against a synthetic repository."
+    )
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--pulls", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Don't trace the memory.")
+    parser.add_argument("--json", metavar="FILE",
+                        help="Write the results as JSON to FILE.")
+    args, pygcgen_args = parser.parse_known_args()
+
+    start = time.time()
+    repo = SyntheticRepo(args.tags, args.issues, args.pulls, args.seed)
+    print("Generated repository with {0} tags, {1} issues and {2} pull "
+          "requests in {3:.1f}s".format(args.tags, args.issues, args.pulls,
+                                        time.time() - start))
+
+    github = FakeGitHub(repo)
+    options = OptionsParser([
+        "-u", USER, "-p", PROJECT, "-t", "0" * 40, "-q", "--no-local-git",
+        "--options-file", os.path.join(HERE, "nonexistent"),
+    ] + pygcgen_args).options
+    with github.installed():
+        generator = Generator(options)
+        timer = PhaseTimer()
+        timer.instrument(generator)
+        if not args.no_memory:
+            tracemalloc.start()
+        start, cpu_start = time.time(), time.process_time()
+        log = generator.compound_changelog()
+        wall, cpu = time.time() - start, time.process_time() - cpu_start
+        peak = None
+        if not args.no_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        generator.executor.shutdown()
+
+    requests = OrderedDict(sorted(github.counter.items()))
+    results = OrderedDict([
+        ("repository", OrderedDict([
+            ("tags", args.tags), ("issues", args.issues),
+            ("pulls", args.pulls), ("seed", args.seed)])),
+        ("options", pygcgen_args),
+        ("wall", wall),
+        ("cpu", cpu),
+        ("phases", timer.times),
+        ("requests", sum(requests.values())),
+        ("requests_by_endpoint", requests),
+        ("bytes", github.bytes),
+        ("peak_memory", peak),
+        ("changelog_size", len(log)),
+        # as reported by pygcgen itself (--stats)
+        ("stats", generator.stats.report()),
+    ])
+
+    print("\n{0:<16}{1:>10}".format("phase", "seconds"))
+    for name, seconds in timer.times.items():
+        print("{0:<16}{1:>10.2f}".format(name, seconds))
+    print("{0:<16}{1:>10.2f}  (cpu {2:.2f})".format("total", wall, cpu))
+    print("\n{0:<40}{1:>10}".format("endpoint", "requests"))
+    for endpoint, count in requests.items():
+        print("{0:<40}{1:>10}".format(endpoint, count))
+    print("{0:<40}{1:>10}".format("total", results["requests"]))
+    print("\nreceived {0:.1f} MB".format(github.bytes / 2 ** 20))
+    if peak is not None:
+        print("peak memory {0:.1f} MB".format(peak / 2 ** 20))
+    print("changelog {0} characters".format(len(log)))
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+CPU time and memory of the stages, that work on the fetched data only:
+closed dates, label filters and rendering (sections between the tags).
+The repository is fetched once from the in-process fake of GitHub, then
+the stages are repeated without any requests, like in --serve after a
+webhook event.
+
+    python benchmarks/bench_filtering.py [--tags N] [--issues N]
+        [--pulls N] [--seed N] [--repeat N] [pygcgen options ...]
+
+Needs Python 3 (tracemalloc).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from pygcgen.generator import Generator  # noqa: E402
+from pygcgen.options_parser import OptionsParser  # noqa: E402
+
+from fake_github import FakeGitHub  # noqa: E402
+from synthetic import PROJECT, USER, SyntheticRepo  # noqa: E402
+
+
+def stages(generator):
+    """
+    :param Generator generator: Generator with the fetched data.
+    :return: name and function of each stage
+    """
+
+    return [
+        ("closed dates", lambda: (
+            generator.detect_actual_closed_dates(generator.issues, "issues"),
+            generator.detect_actual_closed_dates(generator.pull_requests,
+                                                 "pull requests"))),
+        ("label filters", lambda: (
+            generator.filter_by_labels(generator.issues, "issues"),
+            generator.filter_by_labels(generator.pull_requests,
+                                       "pull requests"))),
+        ("rendering", generator.render_changelog),
+    ]
+
+
+def measure(func, repeat):
+    """
+    :return: CPU seconds of one run and the memory allocated on top of
+             what is already held, at the peak of one run
+    """
+
+    cpu = time.process_time()
+    for _ in range(repeat):
+        func()
+    cpu = (time.process_time() - cpu) / repeat
+    gc.collect()
+    tracemalloc.start()
+    held = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1] - held
+    tracemalloc.stop()
+    return cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the filtering of pygcgen on fetched data."
+    )
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--issues", type=int, default=5000)
+    parser.add_argument("--pulls", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args, pygcgen_args = parser.parse_known_args()
+
+    repo = SyntheticRepo(args.tags, args.issues, args.pulls, args.seed)
+    github = FakeGitHub(repo)
+    options = OptionsParser([
+        "-u", USER, "-p", PROJECT, "-t", "0" * 40, "-q", "--no-local-git",
+        "--options-file", os.path.join(HERE, "nonexistent"),
+    ] + pygcgen_args).options
+    with github.installed():
+        generator = Generator(options)
+        log = generator.compound_changelog()
+        requests = sum(github.counter.values())
+        print("Fetched {0} issues and {1} pull requests with {2} "
+              "requests".format(len(generator.issues),
+                                len(generator.pull_requests), requests))
+
+        print("\n{0:<16}{1:>12}{2:>14}".format("stage", "cpu ms", "peak MB"))
+        for name, func in stages(generator):
+            cpu, peak = measure(func, args.repeat)
+            print("{0:<16}{1:>12.1f}{2:>14.2f}".format(
+                name, cpu * 1000, peak / 2 ** 20))
+        generator.executor.shutdown()
+
+    if sum(github.counter.values()) != requests:
+        print("WARNING: the stages sent requests.")
+    if generator.render_changelog() != log:
+        print("WARNING: the change log changed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Memory of the issues kept by the generator: raw API dicts compared to
+the compact records of pygcgen.records.
+
+    python benchmarks/bench_records.py [number of issues]
+
+Needs Python 3 (tracemalloc).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import copy
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pygcgen.records import Issue, PullRequest, compact_events  # noqa: E402
+
+LABELS = ["bug", "enhancement", "question", "duplicate", "wontfix", "docs"]
+
+
+def user(n):
+    login = "user{0}".format(n % 50)
+    return {
+        "login": login,
+        "id": n % 50,
+        "avatar_url": "https://avatars.githubusercontent.com/u/{0}".format(n),
+        "url": "https://api.github.com/users/" + login,
+        "html_url": "https://github.com/" + login,
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+def label(n):
+    return {
+        "id": n,
+        "name": LABELS[n],
+        "color": "ededed",
+        "default": True,
+        "url": "https://api.github.com/repos/acme/widget/labels/" + LABELS[n],
+    }
+
+
+def event(n, kind):
+    return {
+        "id": n,
+        "url": "https://api.github.com/repos/acme/widget/issues/events/{0}"
+               .format(n),
+        "actor": user(n),
+        "event": kind,
+        "commit_id": "{0:040x}".format(n) if kind == "merged" else None,
+        "commit_url": None,
+        "created_at": "2017-01-01T00:00:00Z",
+    }
+
+
+def payload(number):
+    """ An issue or pull request like from the issues listing. """
+
+    data = {
+        "url": "https://api.github.com/repos/acme/widget/issues/{0}"
+               .format(number),
+        "html_url": "https://github.com/acme/widget/issues/{0}".format(number),
+        "id": 100000 + number,
+        "number": number,
+        "title": "Item {0} does something".format(number),
+        "user": user(number),
+        "labels": [label(i) for i in range(number % 3)],
+        "state": "closed",
+        "locked": False,
+        "assignee": None,
+        "assignees": [],
+        "milestone": {"title": "v1.{0}".format(number % 10),
+                      "number": number % 10, "state": "closed"}
+        if number % 4 == 0 else None,
+        "comments": 3,
+        "created_at": "2017-01-01T00:00:00Z",
+        "updated_at": "2017-01-02T00:00:00Z",
+        "closed_at": "2017-01-02T00:00:00Z",
+        "author_association": "CONTRIBUTOR",
+        "body": "Some description of the change. " * 10,
+        "reactions": {"total_count": 0, "+1": 0, "-1": 0, "laugh": 0},
+        "events": [event(number * 10 + i, kind) for i, kind in
+                   enumerate(["labeled", "subscribed", "mentioned",
+                              "referenced", "closed"])],
+    }
+    if number % 2:
+        data["pull_request"] = {"url": data["url"],
+                                "html_url": data["html_url"]}
+        data["events"].insert(-1, event(number * 10 + 9, "merged"))
+    return data
+
+
+def measure(build, count):
+    """
+    :return: memory held by the result and peak memory while building
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    items = build(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current, peak
+
+
+def raw(count):
+    # the generator used to deep-copy the issues while filtering
+    return copy.deepcopy([payload(n) for n in range(1, count + 1)])
+
+
+def records(count):
+    items = []
+    for n in range(1, count + 1):
+        data = payload(n)
+        cls = PullRequest if "pull_request" in data else Issue
+        item = cls.from_api(data)
+        item.events = compact_events(data["events"])
+        items.append(item)
+    return copy.deepcopy(items)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print("{0} issues and pull requests".format(count))
+    results = {}
+    for name, build in (("raw dicts", raw), ("records", records)):
+        current, peak = measure(build, count)
+        results[name] = current
+        print("{0:>10}: {1:8.1f} MB held, {2:8.1f} MB peak".format(
+            name, current / 2 ** 20, peak / 2 ** 20))
+    print("reduction: {0:.1f}x".format(
+        results["raw dicts"] / results["records"]))
+
+
+if __name__ == "__main__":
+    main()
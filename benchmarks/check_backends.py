@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Check, that the other backends and engines render the same change log
+as the REST API with threads, against the fake of GitHub.
+
+    python benchmarks/check_backends.py [--tags N] [--issues N]
+        [--pulls N] [--seed N]
+
+Exits with 1, if a change log differs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from pygcgen.generator import Generator  # noqa: E402
+from pygcgen.options_parser import OptionsParser  # noqa: E402
+
+from fake_github import FakeGitHub  # noqa: E402
+from synthetic import PROJECT, USER, SyntheticRepo  # noqa: E402
+
+# options compared with the REST API
+VARIANTS = [
+    ["--backend", "graphql"],
+    ["--engine", "asyncio"],
+]
+# options of all runs
+SCENARIOS = [
+    [],
+    ["--since-tag", "v0.2.0", "--with-unreleased"],
+    ["--release-branch", "master", "--exclude-labels", "wontfix"],
+]
+
+
+def changelog(github, args):
+    """
+    :param FakeGitHub github: fake serving the repository
+    :param list args: pygcgen options
+    :rtype: str, int
+    :return: the change log and the number of requests
+    """
+
+    options = OptionsParser([
+        "-u", USER, "-p", PROJECT, "-t", "0" * 40, "-q", "--no-local-git",
+        "--options-file", os.path.join(HERE, "nonexistent"),
+    ] + args).options
+    github.counter.clear()
+    with github.installed():
+        generator = Generator(options)
+        try:
+            log = generator.compound_changelog()
+        finally:
+            generator.executor.shutdown()
+    return log, sum(github.counter.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the change logs of the backends and engines."
+    )
+    parser.add_argument("--tags", type=int, default=30)
+    parser.add_argument("--issues", type=int, default=400)
+    parser.add_argument("--pulls", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    github = FakeGitHub(
+        SyntheticRepo(args.tags, args.issues, args.pulls, args.seed)
+    )
+    failed = 0
+    for scenario in SCENARIOS:
+        expected, requests = changelog(github, scenario)
+        for variant in VARIANTS:
+            log, variant_requests = changelog(github, variant + scenario)
+            failed += log != expected
+            print("{0:<8}{1:>6} requests (REST {2:>6})  {3}".format(
+                "ok" if log == expected else "DIFFERS", variant_requests,
+                requests, " ".join(variant + scenario)))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
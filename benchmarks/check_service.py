@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Check of --serve: a webhook event posted to a started server has to
+update the change log like a new run of pygcgen.
+
+    python benchmarks/check_service.py [--tags N] [--issues N]
+        [--pulls N] [--seed N] [pygcgen options ...]
+
+An issue is closed after the first render and its "closed" event is
+posted. The change log served afterwards must contain the issue and be
+the same as the one of a new run. Exits with 1 otherwise.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from pygcgen.generator import Generator  # noqa: E402
+from pygcgen.options_parser import OptionsParser  # noqa: E402
+from pygcgen.service import ChangelogServer, IncrementalGenerator  # noqa
+
+from fake_github import FakeGitHub  # noqa: E402
+from synthetic import PROJECT, USER, SyntheticRepo  # noqa: E402
+
+
+def request(server, method, body=None, event=None):
+    """
+    :param ChangelogServer server: started server
+    :param str method: GET or POST
+    :param dict body: payload of a webhook event
+    :param str event: type of the event
+    :rtype: str
+    :return: body of the response
+    """
+
+    connection = HTTPConnection(*server.server_address[:2])
+    headers = {}
+    if body is not None:
+        body = json.dumps(body).encode("utf-8")
+        headers["X-GitHub-Event"] = event
+    connection.request(method, "/", body, headers)
+    response = connection.getresponse()
+    data = response.read().decode("utf-8")
+    connection.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the change log served by --serve after an event."
+    )
+    parser.add_argument("--tags", type=int, default=30)
+    parser.add_argument("--issues", type=int, default=400)
+    parser.add_argument("--pulls", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    args, pygcgen_args = parser.parse_known_args()
+
+    repo = SyntheticRepo(args.tags, args.issues, args.pulls, args.seed)
+    github = FakeGitHub(repo)
+    options = OptionsParser([
+        "-u", USER, "-p", PROJECT, "-t", "0" * 40, "-q", "--no-local-git",
+        "--options-file", os.path.join(HERE, "nonexistent"),
+        "--with-unreleased",
+    ] + pygcgen_args).options
+    with github.installed():
+        generator = IncrementalGenerator(options)
+        generator.start()
+        server = ChangelogServer(("127.0.0.1", 0), generator)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            before = request(server, "GET")
+            # closed after the render, in the next second
+            time.sleep(1.1)
+            item = repo.close_issue("Closed while serving",
+                                    datetime.datetime.utcnow())
+            github.changed()
+            request(server, "POST", {
+                "action": "closed",
+                "issue": repo.issue_payload(item),
+                "repository": {"full_name": "{0}/{1}".format(USER, PROJECT)},
+            }, "issues")
+            served = request(server, "GET")
+        finally:
+            server.shutdown()
+            server.server_close()
+            generator.executor.shutdown()
+
+        generator = Generator(options)
+        expected = generator.compound_changelog()
+        generator.executor.shutdown()
+
+    checks = [
+        ("change log changed", served != before),
+        ("closed issue listed", item["title"] in served),
+        ("same as a new run", served == expected),
+    ]
+    for name, ok in checks:
+        print("{0:<48}{1}".format(name, "ok" if ok else "FAILED"))
+    sys.exit(0 if all(ok for _, ok in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
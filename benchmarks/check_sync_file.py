@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Regression check of --sync-file: a snapshot seeded by a limited run must
+not lose issues. The change log of a plain run after the seeding run has
+to be the same as the one of a run without snapshot.
+
+    python benchmarks/check_sync_file.py [--tags N] [--issues N]
+        [--pulls N] [--seed N]
+
+Exits with 1, if a change log differs.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from pygcgen.generator import Generator  # noqa: E402
+from pygcgen.options_parser import OptionsParser  # noqa: E402
+
+from fake_github import FakeGitHub  # noqa: E402
+from synthetic import PROJECT, USER, SyntheticRepo  # noqa: E402
+
+# options of the first run, which seeds the snapshot
+SEEDS = [
+    ["--max-issues", "150"],
+    ["--since-tag", "v0.2.0"],
+    ["--between-tags", "v0.1.0", "v0.2.0"],
+    ["--unreleased-only"],
+]
+
+
+def changelog(github, args):
+    """
+    :param FakeGitHub github: fake serving the repository
+    :param list args: pygcgen options
+    :rtype: str
+    """
+
+    options = OptionsParser([
+        "-u", USER, "-p", PROJECT, "-t", "0" * 40, "-q", "--no-local-git",
+        "--options-file", os.path.join(HERE, "nonexistent"),
+    ] + args).options
+    with github.installed():
+        generator = Generator(options)
+        try:
+            return generator.compound_changelog()
+        finally:
+            generator.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check change logs from a seeded --sync-file."
+    )
+    parser.add_argument("--tags", type=int, default=30)
+    parser.add_argument("--issues", type=int, default=400)
+    parser.add_argument("--pulls", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    github = FakeGitHub(
+        SyntheticRepo(args.tags, args.issues, args.pulls, args.seed)
+    )
+    expected = changelog(github, [])
+    folder = tempfile.mkdtemp()
+    failed = 0
+    try:
+        for number, seed in enumerate(SEEDS):
+            sync_file = os.path.join(folder, "sync{0}.json".format(number))
+            changelog(github, ["--sync-file", sync_file] + seed)
+            same = changelog(github, ["--sync-file", sync_file]) == expected
+            failed += not same
+            print("{0:<48}{1}".format(
+                "seeded with " + " ".join(seed), "ok" if same else "DIFFERS"))
+    finally:
+        shutil.rmtree(folder)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
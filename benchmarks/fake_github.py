@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+In-process fake of the GitHub REST endpoints used by the Fetcher and
+of the GraphQL queries of the GraphQLFetcher.
+
+The fake replaces the HTTP connection of the GitHub clients and the
+connection pool of the asyncio engine, so the requests go through
+agithub (or the AsyncFetcher), the keep-alive transport, the rate limit
+governor and the response handling of pygcgen as usual, but are
+answered without any network.
+Responses are serialized to JSON like real ones.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    from urllib.parse import parse_qs, urlencode, urlparse
+except ImportError:
+    from urllib import urlencode
+    from urlparse import parse_qs, urlparse
+
+from agithub.base import Client
+
+from pygcgen.async_fetcher import ConnectionPool
+from pygcgen.graphql_fetcher import (
+    ISSUES_QUERY, PULL_REQUESTS_QUERY, TAGS_QUERY
+)
+from synthetic import PROJECT, USER, iso
+
+PREFIX = "/repos/{0}/{1}".format(USER, PROJECT)
+
+
+class FakeResponse(object):
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def getheader(self, name, default=None):
+        for key, value in self.headers:
+            if key.lower() == name.lower():
+                return value
+        return default
+
+    def getheaders(self):
+        return self.headers
+
+
+class FakeConnection(object):
+    """ Stands in for a HTTPSConnection of a GitHub client. """
+
+    def __init__(self, github):
+        self.github = github
+        self.pending = None
+
+    def request(self, method, url, body=None, headers=None):
+        self.pending = (method, url, body)
+
+    def getresponse(self):
+        return self.github.handle(*self.pending)
+
+    def close(self):
+        pass
+
+
+class FakeGitHub(object):
+    """ Answers the requests of the Fetcher from a SyntheticRepo. """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.lock = threading.Lock()
+        self.counter = Counter()
+        self.bytes = 0
+        self.listings = {}
+
+    @contextmanager
+    def installed(self):
+        """ Let all GitHub clients of pygcgen use the fake. """
+
+        original = Client.get_connection, ConnectionPool.request
+        github = self
+
+        async def request(pool, method, path, headers):
+            response = github.handle(method, path)
+            return response.status, response.headers, response.body
+
+        Client.get_connection = lambda client: FakeConnection(self)
+        ConnectionPool.request = request
+        try:
+            yield self
+        finally:
+            Client.get_connection, ConnectionPool.request = original
+
+    def changed(self):
+        """ Build the listings again, after the repository changed. """
+        with self.lock:
+            self.listings.clear()
+
+    def listing(self, key, build):
+        """ Sorted lists are built once and shared by all pages. """
+        with self.lock:
+            if key not in self.listings:
+                self.listings[key] = build()
+            return self.listings[key]
+
+    def handle(self, method, url, body=None):
+        parts = urlparse(url)
+        path = parts.path
+        query = dict((k, v[0]) for k, v in parse_qs(parts.query).items())
+        endpoint = re.sub(r"/\d+(/|$)", r"/N\1",
+                          re.sub(r"/[0-9a-f]{40}$", "/SHA", path))
+        with self.lock:
+            self.counter[endpoint] += 1
+        if path == "/graphql":
+            status, data, link = self.graphql(json.loads(body))
+        else:
+            status, data, link = self.route(path, query)
+        body = json.dumps(data).encode("utf-8")
+        with self.lock:
+            self.bytes += len(body)
+        headers = [
+            ("Content-Type", "application/json; charset=utf-8"),
+            ("X-RateLimit-Limit", "5000"),
+            ("X-RateLimit-Remaining", "4999"),
+            ("X-RateLimit-Reset", "9999999999"),
+        ]
+        if link:
+            headers.append(("Link", link))
+        return FakeResponse(status, headers, body)
+
+    def route(self, path, query):
+        repo = self.repo
+        if path == PREFIX:
+            return 200, repo.repo_payload(), None
+        if path == PREFIX + "/tags":
+            tags = self.listing("tags", repo.tag_payloads)
+            return self.page(path, query, tags)
+        if path == PREFIX + "/milestones":
+            return self.page(path, query, repo.milestone_payloads())
+        if path == PREFIX + "/issues":
+            return self.page(path, query, self.issues(query),
+                             repo.issue_payload)
+        if path == PREFIX + "/pulls":
+            return self.page(path, query, self.pulls(query),
+                             repo.pull_payload)
+        if path == PREFIX + "/issues/events":
+            return self.page(path, query, self.listing("feed", self.feed),
+                             self.feed_payload)
+        match = re.match(PREFIX + r"/issues/(\d+)/events$", path)
+        if match and int(match.group(1)) in repo.events:
+            return self.page(path, query,
+                             repo.event_payloads(int(match.group(1))))
+        match = re.match(PREFIX + r"/git/commits/([0-9a-f]{40})$", path)
+        if match and match.group(1) in repo.commits:
+            return 200, repo.commit_payload(match.group(1)), None
+        return 404, {"message": "Not Found"}, None
+
+    def graphql(self, request):
+        """ Answers the queries of the GraphQLFetcher. """
+
+        query, variables = request["query"], request["variables"]
+        repo = self.repo
+        if query == TAGS_QUERY:
+            connection = "refs"
+            items = list(enumerate(reversed(repo.tags)))
+            node = self.tag_node
+        elif query == ISSUES_QUERY:
+            connection = "issues"
+            items = [i for i in repo.items if not i["pull_request"]]
+            node = self.issue_node
+        elif query == PULL_REQUESTS_QUERY:
+            connection = "pullRequests"
+            items = [i for i in repo.items if i["pull_request"]]
+            node = self.pull_node
+        else:
+            return 200, {"errors": [{"message": "Unknown query"}]}, None
+        start = int(variables.get("after") or 0)
+        end = start + variables["first"]
+        return 200, {"data": {"repository": {
+            "createdAt": iso(repo.created),
+            connection: {
+                "nodes": [node(item) for item in items[start:end]],
+                "pageInfo": {"hasNextPage": end < len(items),
+                             "endCursor": str(end)},
+            },
+        }}}, None
+
+    def commit_node(self, commit):
+        if not commit:
+            return None
+        author_date, committer_date = self.repo.commits[commit]
+        return {"oid": commit, "authoredDate": author_date,
+                "committedDate": committer_date}
+
+    def tag_node(self, entry):
+        index, (name, commit) = entry
+        target = self.commit_node(commit)
+        if index % 2:
+            # annotated tag
+            target = {"target": target}
+        return {"name": name, "target": target}
+
+    def item_node(self, item):
+        payload = self.repo.issue_payload(item)
+        return {
+            "number": item["number"],
+            "title": item["title"],
+            "url": payload["html_url"],
+            "createdAt": item["created_at"],
+            "updatedAt": item["updated_at"],
+            "closedAt": item["closed_at"],
+            "author": {"login": payload["user"]["login"],
+                       "url": payload["user"]["html_url"]},
+            "milestone": {"title": item["milestone"]}
+            if item["milestone"] else None,
+            "labels": {"nodes": [{"name": label}
+                                 for label in item["labels"]]},
+        }
+
+    def issue_node(self, item):
+        node = self.item_node(item)
+        closed = [event for event in self.repo.events[item["number"]]
+                  if event[0] == "closed"][-1:]
+        node["timelineItems"] = {"nodes": []}
+        for _, commit, date, _ in closed:
+            closer = self.commit_node(commit)
+            if closer and item["number"] % 2:
+                # closed by a pull request
+                closer = {"mergeCommit": closer}
+            node["timelineItems"]["nodes"].append(
+                {"createdAt": date, "closer": closer}
+            )
+        return node
+
+    def pull_node(self, item):
+        node = self.item_node(item)
+        merged = [event for event in self.repo.events[item["number"]]
+                  if event[0] == "merged"][-1:]
+        node.update({
+            "mergedAt": item.get("merged_at"),
+            "baseRefName": item["base"],
+            "mergeCommit": self.commit_node(item.get("merge_commit_sha")),
+            "timelineItems": {"nodes": [
+                {"createdAt": date, "commit": self.commit_node(commit)}
+                for _, commit, date, _ in merged
+            ]},
+        })
+        return node
+
+    def issues(self, query):
+        items = self.repo.items
+        if query.get("sort") == "updated":
+            items = self.listing("issues by update", lambda: sorted(
+                self.repo.items, key=lambda i: i["updated_at"], reverse=True
+            ))
+            if query.get("direction") == "asc":
+                items = items[::-1]
+        if "since" in query:
+            items = [i for i in items if i["updated_at"] >= query["since"]]
+        if "milestone" in query:
+            items = [i for i in items if i["milestone"] and str(
+                self.repo.milestones[i["milestone"]]) == query["milestone"]]
+        return items
+
+    def pulls(self, query):
+        items = self.listing("pulls", lambda: [
+            i for i in self.repo.items if i["pull_request"]
+        ])
+        if query.get("sort") == "updated":
+            items = sorted(items, key=lambda i: i["updated_at"],
+                           reverse=query.get("direction", "desc") == "desc")
+        if "base" in query:
+            items = [i for i in items if i["base"] == query["base"]]
+        return items
+
+    def feed(self):
+        """ Events of all issues, newest first. """
+        events = []
+        for number, history in self.repo.events.items():
+            for index, event in enumerate(history):
+                events.append((event[2], number, index, event))
+        events.sort(reverse=True)
+        return events
+
+    def feed_payload(self, entry):
+        _, number, index, event = entry
+        payload = self.repo.event_payload(number, index, event)
+        payload["issue"] = self.repo.issue_payload(self.repo.by_number[number])
+        return payload
+
+    @staticmethod
+    def page(path, query, items, payload=None):
+        """
+        One page of a listing with the Link header to the next and the
+        last page.
+        """
+
+        page = int(query.get("page", 1))
+        per_page = int(query.get("per_page", 30))
+        last = max(1, -(-len(items) // per_page))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if payload:
+            chunk = [payload(item) for item in chunk]
+
+        def link(number, rel):
+            params = dict(query, page=number)
+            return '<https://api.github.com{0}?{1}>; rel="{2}"'.format(
+                path, urlencode(sorted(params.items())), rel)
+
+        links = []
+        if page < last:
+            links.append(link(page + 1, "next"))
+            links.append(link(last, "last"))
+        if page > 1:
+            links.append(link(1, "first"))
+            links.append(link(page - 1, "prev"))
+        return 200, chunk, ", ".join(links) or None
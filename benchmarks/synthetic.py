@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic GitHub repository for the benchmarks.
+
+The repository is generated from a seed, so the same arguments always
+give the same repository. Items are kept compact and expanded into
+full API payloads (with body, reactions, users, ...) when requested.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import random
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+USER = "acme"
+PROJECT = "widget"
+
+LABELS = [
+    # name, probability
+    ("bug", 0.30),
+    ("enhancement", 0.25),
+    ("documentation", 0.08),
+    ("question", 0.06),
+    ("duplicate", 0.04),
+    ("invalid", 0.03),
+    ("wontfix", 0.04),
+    ("help wanted", 0.05),
+    ("good first issue", 0.04),
+    ("notice", 0.02),
+]
+NOISE_EVENTS = ["labeled", "subscribed", "mentioned", "referenced",
+                "assigned", "renamed"]
+
+
+def iso(date):
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def sha(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class SyntheticRepo(object):
+    """
+    A repository with tags, closed issues and pull requests, their
+    events and the commits referenced by them.
+    """
+
+    def __init__(self, tags=50, issues=2000, pulls=1000, seed=1):
+        """
+        :param int tags: Number of tags.
+        :param int issues: Number of closed issues.
+        :param int pulls: Number of closed pull requests.
+        :param int seed: Seed of the random generator.
+        """
+
+        rnd = random.Random(seed)
+        self.created = datetime(2012, 1, 1)
+        self.commits = {}
+        self.users = ["user{0}".format(n)
+                      for n in range(max(20, (issues + pulls) // 25))]
+
+        # tags, oldest first, a release every few days
+        self.tags = []
+        date = self.created
+        for n in range(tags):
+            date += timedelta(days=rnd.randint(1, 6), hours=rnd.randint(0, 23))
+            name = "v{0}.{1}.{2}".format(n // 100, n // 10 % 10, n % 10)
+            self.tags.append((name, self.add_commit("tag " + name, date)))
+        self.tag_dates = [self.commits[s][0] for _, s in self.tags]
+        # a milestone for every release
+        self.milestones = dict((name, number) for number, (name, _)
+                               in enumerate(self.tags, start=1))
+        end = date + timedelta(days=10)
+        span = int((end - self.created).total_seconds())
+
+        kinds = [False] * issues + [True] * pulls
+        rnd.shuffle(kinds)
+        self.items = []
+        self.events = {}
+        for number, is_pr in enumerate(kinds, start=1):
+            created = self.created + timedelta(seconds=rnd.randint(0, span))
+            closed = min(
+                created + timedelta(hours=int(rnd.expovariate(1 / 72.0)) + 1),
+                end - timedelta(hours=1)
+            )
+            item = {
+                "number": number,
+                "pull_request": is_pr,
+                "title": "{0} number {1} does something".format(
+                    "Change" if is_pr else "Problem", number),
+                "user": rnd.choice(self.users),
+                "labels": [name for name, p in LABELS if rnd.random() < p],
+                "milestone": None,
+                "created_at": iso(created),
+                "closed_at": iso(closed),
+                "updated_at": iso(closed + timedelta(
+                    minutes=rnd.randint(0, 600))),
+            }
+            if rnd.random() < 0.1:
+                # milestone of the next release
+                index = bisect_left(self.tag_dates, iso(closed))
+                if index < len(self.tags):
+                    item["milestone"] = self.tags[index][0]
+            self.events[number] = self.make_events(rnd, item, created,
+                                                   closed)
+            self.items.append(item)
+        # the default order of the issues listing: newest first
+        self.items.sort(key=lambda i: (i["created_at"], i["number"]),
+                        reverse=True)
+        self.by_number = dict((i["number"], i) for i in self.items)
+
+    def close_issue(self, title, closed):
+        """
+        Add an issue, that is closed after the repository was generated.
+
+        :param str title: Title of the issue.
+        :param datetime closed: Time of the closing.
+        :rtype: dict
+        :return: the new item
+        """
+
+        number = max(self.by_number) + 1
+        item = {
+            "number": number,
+            "pull_request": False,
+            "title": title,
+            "user": self.users[0],
+            "labels": [],
+            "milestone": None,
+            "created_at": iso(closed - timedelta(hours=1)),
+            "closed_at": iso(closed),
+            "updated_at": iso(closed),
+        }
+        self.events[number] = [("closed", None, iso(closed), item["user"])]
+        # the newest item
+        self.items.insert(0, item)
+        self.by_number[number] = item
+        return item
+
+    def add_commit(self, text, date):
+        commit = sha(text)
+        self.commits[commit] = (iso(date - timedelta(minutes=30)), iso(date))
+        return commit
+
+    def make_events(self, rnd, item, created, closed):
+        """
+        Event history of an item: some noise, sometimes a reopening,
+        then the closing ("merged" and "closed" for pull requests).
+
+        :rtype: list(tuple)
+        :return: (event, commit_id, created_at, actor) in date order
+        """
+
+        number = item["number"]
+        actor = item["user"]
+        events = [("labeled", None, iso(created), actor)
+                  for _ in item["labels"]]
+        for _ in range(rnd.randint(0, 4)):
+            events.append((rnd.choice(NOISE_EVENTS), None, iso(created),
+                           rnd.choice(self.users)))
+        if rnd.random() < 0.05:
+            reopened = created + (closed - created) // 2
+            events.append(("closed", None, iso(reopened), actor))
+            events.append(("reopened", None, iso(reopened), actor))
+        if item["pull_request"]:
+            item["base"] = "master" if rnd.random() < 0.9 else "develop"
+            if rnd.random() < 0.85:
+                commit = self.add_commit("merge {0}".format(number), closed)
+                item["merge_commit_sha"] = commit
+                item["merged_at"] = iso(closed)
+                events.append(("merged", commit, iso(closed), actor))
+            events.append(("closed", None, iso(closed), actor))
+        elif rnd.random() < 0.25:
+            # closed by a commit
+            commit = self.add_commit("fix {0}".format(number), closed)
+            events.append(("closed", commit, iso(closed), actor))
+        else:
+            events.append(("closed", None, iso(closed), actor))
+        return events
+
+    # payloads as returned by the API
+
+    @staticmethod
+    def user_payload(login):
+        return {
+            "login": login,
+            "id": int(sha(login)[:6], 16),
+            "avatar_url": "https://avatars.githubusercontent.com/" + login,
+            "url": "https://api.github.com/users/" + login,
+            "html_url": "https://github.com/" + login,
+            "type": "User",
+            "site_admin": False,
+        }
+
+    @staticmethod
+    def label_payload(name):
+        return {
+            "id": int(sha(name)[:6], 16),
+            "url": "https://api.github.com/repos/{0}/{1}/labels/{2}".format(
+                USER, PROJECT, name),
+            "name": name,
+            "color": sha(name)[:6],
+            "default": True,
+        }
+
+    def repo_payload(self):
+        return {
+            "id": 1,
+            "name": PROJECT,
+            "full_name": "{0}/{1}".format(USER, PROJECT),
+            "owner": self.user_payload(USER),
+            "created_at": iso(self.created),
+        }
+
+    def tag_payloads(self):
+        """ Tags, newest first. """
+        return [{
+            "name": name,
+            "commit": {
+                "sha": commit,
+                "url": "https://api.github.com/repos/{0}/{1}/commits/{2}"
+                       .format(USER, PROJECT, commit),
+            },
+            "zipball_url": "https://api.github.com/repos/{0}/{1}/zipball/{2}"
+                           .format(USER, PROJECT, name),
+            "tarball_url": "https://api.github.com/repos/{0}/{1}/tarball/{2}"
+                           .format(USER, PROJECT, name),
+        } for name, commit in reversed(self.tags)]
+
+    def milestone_payloads(self):
+        """ Milestones, newest first. """
+        return [{
+            "title": name,
+            "number": self.milestones[name],
+            "state": "closed",
+        } for name, _ in reversed(self.tags)]
+
+    def commit_payload(self, commit):
+        author_date, committer_date = self.commits[commit]
+        return {
+            "sha": commit,
+            "url": "https://api.github.com/repos/{0}/{1}/git/commits/{2}"
+                   .format(USER, PROJECT, commit),
+            "author": {"name": "Someone", "email": "someone@example.com",
+                       "date": author_date},
+            "committer": {"name": "GitHub", "email": "noreply@github.com",
+                          "date": committer_date},
+            "message": "Commit " + commit,
+            "tree": {"sha": sha("tree " + commit)},
+            "parents": [{"sha": sha("parent " + commit)}],
+        }
+
+    def issue_payload(self, item):
+        number = item["number"]
+        kind = "pull" if item["pull_request"] else "issues"
+        payload = {
+            "url": "https://api.github.com/repos/{0}/{1}/issues/{2}".format(
+                USER, PROJECT, number),
+            "html_url": "https://github.com/{0}/{1}/{2}/{3}".format(
+                USER, PROJECT, kind, number),
+            "id": 1000000 + number,
+            "number": number,
+            "title": item["title"],
+            "user": self.user_payload(item["user"]),
+            "labels": [self.label_payload(label)
+                       for label in item["labels"]],
+            "state": "closed",
+            "locked": False,
+            "assignee": None,
+            "assignees": [],
+            "milestone": {
+                "title": item["milestone"],
+                "number": self.milestones[item["milestone"]],
+                "state": "closed"
+            } if item["milestone"] else None,
+            "comments": number % 7,
+            "created_at": item["created_at"],
+            "updated_at": item["updated_at"],
+            "closed_at": item["closed_at"],
+            "author_association": "CONTRIBUTOR",
+            "body": "Some description of the problem or change. " * 8,
+            "reactions": {"total_count": 0, "+1": 0, "-1": 0, "laugh": 0,
+                          "hooray": 0, "confused": 0, "heart": 0},
+        }
+        if item["pull_request"]:
+            payload["pull_request"] = {
+                "url": "https://api.github.com/repos/{0}/{1}/pulls/{2}"
+                       .format(USER, PROJECT, number),
+                "html_url": payload["html_url"],
+            }
+        return payload
+
+    def pull_payload(self, item):
+        payload = self.issue_payload(item)
+        del payload["pull_request"]
+        payload.update({
+            "merged_at": item.get("merged_at"),
+            "merge_commit_sha": item.get("merge_commit_sha") or
+            sha("unmerged {0}".format(item["number"])),
+            "base": {"ref": item["base"], "label": USER + ":" + item["base"]},
+            "head": {"ref": "feature-{0}".format(item["number"])},
+        })
+        return payload
+
+    def event_payload(self, number, index, event):
+        kind, commit, date, actor = event
+        return {
+            "id": number * 100 + index,
+            "url": "https://api.github.com/repos/{0}/{1}/issues/events/{2}"
+                   .format(USER, PROJECT, number * 100 + index),
+            "actor": self.user_payload(actor),
+            "event": kind,
+            "commit_id": commit,
+            "commit_url": commit and
+            "https://api.github.com/repos/{0}/{1}/commits/{2}".format(
+                USER, PROJECT, commit),
+            "created_at": date,
+        }
+
+    def event_payloads(self, number):
+        return [self.event_payload(number, n, e)
+                for n, e in enumerate(self.events[number])]
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from .main import ChangelogGenerator
+from .batch import BatchGenerator
 
-__all__ = ["ChangelogGenerator"]
+__all__ = ["BatchGenerator", "ChangelogGenerator"]
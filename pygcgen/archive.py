@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import deque
+if sys.version_info.major == 3:
+    from builtins import object
+    from urllib.parse import urlencode
+else:
+    from urllib import urlencode
+
+from .pygcgen_exceptions import GithubApiError
+from .transport import Response
+
+
+ARCHIVE_VERSION = 1
+ARCHIVE_FILE = "traffic.jsonl.gz"
+# headers needed to replay a run: paging and rate limit handling
+ARCHIVED_HEADERS = ("link", "etag", "retry-after", "x-ratelimit-limit",
+                    "x-ratelimit-remaining", "x-ratelimit-reset")
+
+
+def request_key(method, path, params=None, body=None):
+    """
+    Key of a request in the archive. The endpoint isn't part of it,
+    so an archive can be replayed against any endpoint name.
+
+    :param str method: HTTP method.
+    :param str path: Path of the resource, e.g. /repos/user/project/tags
+    :param dict params: Query parameters.
+    :param body: JSON body of the request.
+    :rtype: str
+    """
+
+    key = "{0} {1}".format(method, path)
+    if params:
+        key += "?" + urlencode(sorted(params.items()))
+    if body is not None:
+        digest = hashlib.sha1(
+            json.dumps(body, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        key += " " + digest
+    return key
+
+
+class TrafficArchive(object):
+    """
+    Archive of all requests to GitHub and their responses, to run the
+    generation again offline and with the same results.
+
+    When recording, the final response of each request (after retries)
+    is appended to a gzipped JSON lines file as soon as it arrived. When
+    replaying, the responses are read back and served in the order they
+    were recorded, without waiting for the rate limit. Requests, that
+    aren't in the archive, fail.
+    """
+
+    def __init__(self, directory, replay=False):
+        """
+        :param str directory: Directory of the archive.
+        :param bool replay: True to replay, False to record.
+        """
+
+        self.path = os.path.join(directory, ARCHIVE_FILE)
+        self.replaying = replay
+        self.lock = threading.Lock()
+        self.responses = {}
+        self.fh = None
+        if replay:
+            self.load()
+        else:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self.fh = gzip.open(self.path, "wb")
+            self.write({"version": ARCHIVE_VERSION})
+
+    def count(self):
+        """ Number of responses to replay. """
+        return sum(len(r) for r in self.responses.values())
+
+    def load(self):
+        """ Read all responses of the archive. """
+
+        try:
+            with gzip.open(self.path, "rb") as fh:
+                lines = fh.read().decode("utf-8").splitlines()
+        except (IOError, OSError) as err:
+            raise GithubApiError(
+                "Can't read the archive {0}: {1}".format(self.path, err)
+            )
+        header = json.loads(lines[0]) if lines else {}
+        if header.get("version") != ARCHIVE_VERSION:
+            raise GithubApiError(
+                "Unknown archive version in {0}".format(self.path)
+            )
+        for line in lines[1:]:
+            entry = json.loads(line)
+            self.responses.setdefault(entry["key"], deque()).append(
+                Response(entry["status"], entry["data"], entry["headers"])
+            )
+
+    def write(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.fh.write(line.encode("utf-8"))
+
+    def record(self, key, response):
+        """
+        Append a response to the archive.
+
+        :param str key: Key of the request, see request_key().
+        :param Response response: Response of GitHub.
+        :rtype: Response
+        :return: the response
+        """
+
+        rc, data, headers = response
+        if isinstance(data, bytes):
+            # body of an error page, that isn't JSON
+            data = data.decode("utf-8", "replace")
+        self.write({
+            "key": key,
+            "status": rc,
+            "data": data,
+            "headers": [[k, v] for k, v in headers
+                        if k.lower() in ARCHIVED_HEADERS],
+        })
+        return response
+
+    def replay(self, key):
+        """
+        Get the next recorded response of a request. The last response
+        of a request is served again for any further requests.
+
+        :param str key: Key of the request, see request_key().
+        :rtype: Response
+        """
+
+        with self.lock:
+            responses = self.responses.get(key)
+            if not responses:
+                raise GithubApiError(
+                    "Request not found in the archive: {0}".format(key)
+                )
+            if len(responses) > 1:
+                return responses.popleft()
+            return responses[0]
+
+    def call(self, key, send):
+        """
+        Send a request and record its response, or replay it.
+
+        :param str key: Key of the request, see request_key().
+        :param send: Function sending the request (with retries),
+                     returning a Response.
+        :rtype: Response
+        """
+
+        if self.replaying:
+            return self.replay(key)
+        return self.record(key, send())
+
+    def close(self):
+        """ Finish writing the archive. """
+
+        with self.lock:
+            if self.fh is not None:
+                self.fh.close()
+                self.fh = None
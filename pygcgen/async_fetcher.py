@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio based fetching of events, commits and tag dates (Python 3 only).
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlencode
+
+from .archive import request_key
+from .fetcher import LastPage, PER_PAGE_NUMBER
+from .records import compact_events
+from .transport import Response
+from .version import __title__, __version__
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive HTTP/1.1 connections to the GitHub API, used by the
+    requests of one event loop.
+    """
+
+    def __init__(self, host, secure=True, size=10):
+        """
+        :param str host: Host of the API, optionally with port.
+        :param bool secure: Use HTTPS.
+        :param int size: Max number of idle connections kept open.
+        """
+
+        self.host = host
+        self.secure = secure
+        self.size = size
+        self.idle = []
+        if ":" in host:
+            self.hostname, port = host.rsplit(":", 1)
+            self.port = int(port)
+        else:
+            self.hostname = host
+            self.port = 443 if secure else 80
+
+    async def open_connection(self):
+        return await asyncio.open_connection(
+            self.hostname, self.port,
+            ssl=ssl.create_default_context() if self.secure else None
+        )
+
+    async def request(self, method, path, headers):
+        """
+        Send a request, reusing an idle connection if there is one.
+
+        :param str method: HTTP method.
+        :param str path: Path including the query.
+        :param dict headers: Request headers.
+        :rtype: int, list, bytes
+        :return: status code, headers and body of the response
+        """
+
+        reused = bool(self.idle)
+        reader, writer = self.idle.pop() if reused \
+            else await self.open_connection()
+        try:
+            return await self.send(reader, writer, method, path, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if not reused:
+                raise
+            # the server closed the idle connection, use a new one
+            reader, writer = await self.open_connection()
+            return await self.send(reader, writer, method, path, headers)
+
+    async def send(self, reader, writer, method, path, headers):
+        lines = ["{0} {1} HTTP/1.1".format(method, path),
+                 "Host: {0}".format(self.host)]
+        lines.extend("{0}: {1}".format(k, v) for k, v in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        response_headers = []
+        while True:
+            line = (await reader.readuntil(b"\r\n")).decode("latin-1")
+            if line == "\r\n":
+                break
+            k, v = line.split(":", 1)
+            response_headers.append((k.strip(), v.strip()))
+        hdr = dict((k.lower(), v) for k, v in response_headers)
+
+        keep_alive = hdr.get("connection", "").lower() != "close"
+        if status in (204, 304) or method == "HEAD":
+            body = b""
+        elif hdr.get("transfer-encoding", "").lower() == "chunked":
+            body = await self.read_chunked(reader)
+        elif "content-length" in hdr:
+            body = await reader.readexactly(int(hdr["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        if keep_alive and len(self.idle) < self.size:
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, response_headers, body
+
+    @staticmethod
+    async def read_chunked(reader):
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if not size:
+                # skip trailers
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+class AsyncFetcher(object):
+    """
+    Fetches events, commits and tag dates with asyncio. The number of
+    requests in flight is bounded by --max-simultaneous-requests, the
+    requests share a pool of keep-alive connections.
+
+    The coroutines can be used directly, the synchronous Fetcher API uses
+    them through run().
+    """
+
+    def __init__(self, fetcher):
+        """
+        :param Fetcher fetcher: Fetcher to share options, cache and
+                                results with.
+        """
+
+        self.fetcher = fetcher
+        self.options = fetcher.options
+        self.pool = None
+        self.semaphore = None
+        self.active = 0
+        self.pending = {}
+
+    def run(self, coro):
+        """
+        Run a coroutine in a new event loop with its own connection pool.
+
+        :param coro: coroutine of this AsyncFetcher
+        :return: result of the coroutine
+        """
+
+        async def runner():
+            self.pool = ConnectionPool(
+                self.options.github_endpoint,
+                size=self.options.max_simultaneous_requests
+            )
+            self.semaphore = asyncio.Semaphore(
+                self.options.max_simultaneous_requests
+            )
+            try:
+                return await coro
+            finally:
+                self.pool.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(runner())
+        finally:
+            loop.close()
+
+    def request_headers(self):
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "{0}/{1}".format(__title__, __version__),
+            "Connection": "keep-alive",
+        }
+        if self.options.token:
+            headers["Authorization"] = "Token {0}".format(self.options.token)
+        return headers
+
+    async def get(self, path, immutable=False, **params):
+        """
+        GET a resource from GitHub, using the response cache if enabled.
+
+        :param str path: Path of the resource.
+        :param bool immutable: True, if the resource never changes.
+        :param params: Query parameters for the request.
+        :rtype: Response
+        :return: status code, data and headers of the response
+        """
+
+        fetcher = self.fetcher
+        headers = self.request_headers()
+        key = entry = None
+        if fetcher.cache:
+            key, entry = fetcher.cache_lookup(path, params)
+            if entry and entry["immutable"]:
+                fetcher.stats.counters.add("cache_hits")
+                return Response(200, entry["data"], entry["headers"])
+            headers.update(fetcher.conditional_headers(entry))
+        archive = fetcher.archive
+        archive_key = request_key("GET", path, params)
+        endpoint = path
+        if params:
+            path += "?" + urlencode(params)
+
+        async def send():
+            rc, response_headers, body = await self.pool.request(
+                "GET", path, headers
+            )
+            fetcher.stats.request(endpoint, len(body))
+            data = json.loads(body.decode("utf-8")) if body else body
+            return Response(rc, data, response_headers)
+
+        if archive and archive.replaying:
+            response = archive.replay(archive_key)
+        else:
+            response = Response(*await self.call(send))
+            if archive:
+                archive.record(archive_key, response)
+        if fetcher.cache:
+            return fetcher.cache_response(key, entry, immutable, *response)
+        return response
+
+    async def get_pages(self, path, **params):
+        """
+        GET all pages of a GitHub listing. After the first page, the
+        remaining pages (known from the Link rel="last" header) are
+        requested at once.
+
+        :param str path: Path of the resource.
+        :param params: Query parameters for the request.
+        :rtype: list
+        :return: items of all pages, in order
+        """
+
+        async def fetch(page):
+            rc, data, headers = await self.get(
+                path, page=page, per_page=PER_PAGE_NUMBER, **params
+            )
+            if rc != 200:
+                self.fetcher.raise_GitHubError(rc, data, headers)
+            return data, headers
+
+        data, headers = await fetch(1)
+        items = list(data)
+        pages = await asyncio.gather(
+            *[fetch(page) for page in range(2, LastPage(headers) + 1)]
+        )
+        for data, _ in pages:
+            items.extend(data)
+        return items
+
+    async def call(self, send):
+        """
+        Send a request within the rate limit, like RateLimitGovernor.call,
+        but without blocking the event loop.
+
+        :param send: coroutine function sending the request,
+                     returning status code, data and headers.
+        :rtype: int, list|dict, list
+        :return: status code, data and headers of the (last) response
+        """
+
+        governor = self.fetcher.governor
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                while True:
+                    delay = governor.paused_until - time.time()
+                    if delay <= 0 and self.active < governor.concurrency():
+                        break
+                    await asyncio.sleep(delay if delay > 0 else 0.1)
+                self.active += 1
+                try:
+                    rc, data, headers = await send()
+                finally:
+                    self.active -= 1
+            delay = governor.update(rc, data, headers, attempt)
+            if delay is None:
+                return rc, data, headers
+            await asyncio.sleep(delay)
+            governor.add_wait(delay)
+            attempt += 1
+
+    def repo_path(self, *parts):
+        return "/".join(
+            ["", "repos", self.options.user, self.options.project] +
+            [str(p) for p in parts]
+        )
+
+    async def fetch_events(self, issue):
+        """
+        Fetch all events of an issue.
+
+        :param dict issue: issue to add the events to
+        """
+
+        if self.fetcher.events_from_snapshot(issue):
+            return
+        events = await self.get_pages(
+            self.repo_path("issues", issue["number"], "events")
+        )
+        self.fetcher.counters.add("events", len(events))
+        issue['events'] = compact_events(events)
+        self.fetcher.events_to_snapshot(issue)
+        if self.options.verbose > 2:
+            print(".", end="")
+
+    async def fetch_events_for_issues(self, issues):
+        await asyncio.gather(*[self.fetch_events(i) for i in issues])
+
+    async def fetch_commit(self, sha):
+        """
+        Fetch a commit. Simultaneous calls for the same SHA share
+        one request.
+
+        :param str sha: SHA of the commit
+        :rtype: dict
+        :return: dictionary with commit data (sha, author and committer)
+        """
+
+        commit = self.fetcher.commits.get(sha) or \
+            self.fetcher.commit_from_local_git(sha)
+        if commit:
+            return commit
+        task = self.pending.get(sha)
+        if task is None:
+            task = self.pending[sha] = asyncio.ensure_future(
+                self.get_commit(sha)
+            )
+            task.add_done_callback(lambda _: self.pending.pop(sha, None))
+        return await task
+
+    async def get_commit(self, sha):
+        rc, data, headers = await self.get(
+            self.repo_path("git", "commits", sha), immutable=True
+        )
+        if rc != 200:
+            self.fetcher.raise_GitHubError(rc, data, headers)
+        return self.fetcher.commits.put(data)
+
+    async def fetch_commits(self, shas):
+        await asyncio.gather(*[self.fetch_commit(sha) for sha in shas])
+
+    async def fetch_date_of_tag(self, tag):
+        """
+        Fetch time for tag from repository.
+
+        :param dict tag: dictionary with tag information
+        :rtype: str
+        :return: time of specified tag as ISO date string
+        """
+
+        commit = await self.fetch_commit(tag["sha"])
+        return commit["committer"]["date"]
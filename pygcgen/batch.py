@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import shlex
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+if sys.version_info.major == 3:
+    from builtins import object
+
+from .main import ChangelogGenerator
+from .options_parser import OptionsParser
+from .pygcgen_exceptions import ChangelogGeneratorError
+from .session import Session
+
+
+# options with file names, which can contain {user} and {project}
+FILE_OPTIONS = ("output", "stats", "sync_file", "commit_store")
+
+
+def read_manifest(filename):
+    """
+    Read the repositories of a batch. Every line holds the command line
+    options of one repository, e.g.
+
+        -u acme -p widget --since-tag v1.0
+        -u acme -p gadget -o gadget/CHANGELOG.md --no-pull-requests
+
+    Empty lines and lines starting with '#' or ';' are skipped.
+
+    :param str filename: Name of the manifest file.
+    :rtype: list(list(str))
+    :return: command line arguments of each repository
+    """
+
+    try:
+        with open(filename, "r") as fh:
+            lines = fh.read().splitlines()
+    except (IOError, OSError) as err:
+        raise ChangelogGeneratorError(
+            "Can't read the manifest {0}: {1}".format(filename, err)
+        )
+    return [shlex.split(line) for line in lines
+            if line.strip() and not line.lstrip().startswith(("#", ";"))]
+
+
+def expand_file_names(options):
+    """
+    Replace {user} and {project} in the file names of the options.
+
+    :param options: parsed options of a repository
+    """
+
+    for name in FILE_OPTIONS:
+        value = getattr(options, name, None)
+        if value:
+            setattr(options, name, value.replace(
+                "{user}", options.user).replace("{project}", options.project))
+
+
+class BatchGenerator(object):
+    """
+    Generates the change logs of several repositories at the same time.
+
+    All generators share one Session: the token, the worker pool with its
+    keep-alive connections, the rate limit governor and the response
+    cache. So a batch takes about as long as GitHub needs to answer all
+    its requests, instead of the sum of all single runs.
+    """
+
+    def __init__(self, options=None, repositories=None):
+        """
+        :param list options: command line arguments for all repositories
+        :param list(list) repositories: command line arguments of each
+                                        repository (at least -u and -p),
+                                        by default read from the manifest
+                                        given with --batch
+        """
+
+        self.args = sys.argv[1:] if options is None else list(options)
+        self.options = OptionsParser(self.args).options
+        if repositories is None:
+            if not self.options.batch:
+                raise ChangelogGeneratorError("No manifest given (--batch).")
+            repositories = read_manifest(self.options.batch)
+        self.repositories = [self.parse(args) for args in repositories]
+        self.check_file_names()
+
+    def parse(self, args):
+        """
+        :param list args: command line arguments of a repository
+        :return: options of the repository
+        """
+
+        options = OptionsParser(self.args + list(args)).options
+        if not options.user or not options.project:
+            raise ChangelogGeneratorError(
+                "User and/or project missing in '{0}'".format(" ".join(args))
+            )
+        expand_file_names(options)
+        return options
+
+    def check_file_names(self):
+        """ Make sure no two repositories write to the same file. """
+
+        used = {}
+        for options in self.repositories:
+            for name in FILE_OPTIONS:
+                path = getattr(options, name, None)
+                if not path:
+                    continue
+                path = os.path.abspath(path)
+                if path in used:
+                    raise ChangelogGeneratorError(
+                        "{0} and {1} both use {2}. Add {{user}} and "
+                        "{{project}} to the file names.".format(
+                            used[path], repo_name(options), path)
+                    )
+                used[path] = repo_name(options)
+
+    def run(self):
+        """
+        Generate and write the change logs of all repositories. A failing
+        repository doesn't stop the others.
+
+        :rtype: OrderedDict
+        :return: report (see --stats) by the output file of each
+                 repository, None for the ones that failed
+        """
+
+        start = time.time()
+        session = Session(self.options)
+        try:
+            with ThreadPoolExecutor(self.options.batch_jobs) as jobs:
+                futures = [jobs.submit(self.generate, options, session)
+                           for options in self.repositories]
+                reports = OrderedDict(
+                    (options.output, future.result())
+                    for options, future in zip(self.repositories, futures)
+                )
+        finally:
+            session.close()
+
+        if not self.options.quiet:
+            failed = sum(1 for report in reports.values() if report is None)
+            print("Generated {0} of {1} change logs in {2:.1f}s.".format(
+                len(reports) - failed, len(reports), time.time() - start))
+            if session.governor.waited:
+                print("Waited {:.0f}s for the GitHub API rate limit "
+                      "({} retries).".format(session.governor.waited,
+                                             session.governor.retried))
+        return reports
+
+    def generate(self, options, session):
+        """
+        Generate the change log of one repository.
+
+        :param options: options of the repository
+        :param Session session: session shared by the batch
+        :rtype: dict
+        :return: the report or None, if it failed
+        """
+
+        name = repo_name(options)
+        try:
+            folder = os.path.dirname(options.output)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            out, report = ChangelogGenerator(options, session).generate()
+        except Exception as err:
+            print("\033[91m\033[1m{0}: {1}\x1b[0m".format(name, err))
+            return None
+        if not options.quiet:
+            if out:
+                print("{0}: written to {1}".format(name, out))
+            else:
+                print("{0}: empty changelog, not written".format(name))
+        return report
+
+
+def repo_name(options):
+    return "{0}/{1}".format(options.user, options.project)
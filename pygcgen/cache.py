@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+if sys.version_info.major == 3:
+    from builtins import object
+
+from .files import write_atomic
+
+
+CACHE_FILE_EXTENSION = ".json"
+
+
+class ResponseCache(object):
+    """
+    Persistent on-disk cache for GitHub API responses.
+
+    Every response is stored in its own file, together with the ETag and
+    the headers needed to continue paging (Link). Stored responses are
+    revalidated with conditional requests, unless they were stored as
+    immutable (e.g. git commits addressed by their SHA).
+    The cache size is capped, least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory, max_size):
+        """
+        :param str directory: Directory to store the responses in.
+        :param int max_size: Maximum size of the cache in bytes.
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.index = OrderedDict()
+        self.size = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.load_index()
+
+    def load_index(self):
+        """
+        Build the LRU index from the files in the cache directory,
+        ordered by their last access (modification) time.
+        """
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self.index[name] = size
+            self.size += size
+
+    @staticmethod
+    def filename(key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest() + \
+            CACHE_FILE_EXTENSION
+
+    def get(self, key):
+        """
+        Get a stored response.
+
+        :param str key: Request URL including the query parameters.
+        :rtype: dict
+        :return: Stored entry with keys "etag", "headers", "data" and
+                 "immutable" or None, if the key isn't cached.
+        """
+
+        name = self.filename(key)
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            if name not in self.index:
+                return None
+            try:
+                with open(path, "rb") as fh:
+                    entry = json.loads(fh.read().decode("utf-8"))
+            except (IOError, OSError, ValueError):
+                self.discard(name)
+                return None
+            if entry.get("key") != key:
+                return None
+            self.index.pop(name)
+            self.index[name] = os.path.getsize(path)
+            os.utime(path, None)
+        return entry
+
+    def touch(self, key):
+        """
+        Mark an entry as recently used (after a successful revalidation).
+
+        :param str key: Request URL including the query parameters.
+        """
+
+        name = self.filename(key)
+        with self.lock:
+            if name in self.index:
+                self.index[name] = self.index.pop(name)
+                os.utime(os.path.join(self.directory, name), None)
+
+    def put(self, key, data, headers, etag=None, immutable=False):
+        """
+        Store a response and evict least recently used entries,
+        if the cache grows bigger than max_size.
+
+        :param str key: Request URL including the query parameters.
+        :param data: Decoded JSON body of the response.
+        :param list headers: Response headers to store with the data.
+        :param str etag: ETag of the response.
+        :param bool immutable: If True, the entry is never revalidated.
+        """
+
+        entry = {
+            "key": key,
+            "etag": etag,
+            "headers": headers,
+            "data": data,
+            "immutable": immutable,
+        }
+        content = json.dumps(entry).encode("utf-8")
+        name = self.filename(key)
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            write_atomic(path, content)
+            self.size -= self.index.pop(name, 0)
+            self.index[name] = len(content)
+            self.size += len(content)
+            self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries until max_size is reached. """
+
+        while self.size > self.max_size and len(self.index) > 1:
+            name = next(iter(self.index))
+            self.discard(name)
+
+    def discard(self, name):
+        self.size -= self.index.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
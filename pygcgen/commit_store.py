@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import sys
+import threading
+if sys.version_info.major == 3:
+    from builtins import object
+
+from .files import write_atomic
+
+
+COMMIT_STORE_VERSION = 1
+
+
+class CommitStore(object):
+    """
+    Dates of commits, keyed by their SHA.
+
+    A commit never changes, so once fetched, its dates are kept for all
+    further lookups and, if a path is given, for later runs as well.
+    Concurrent lookups of the same SHA are coalesced into one request:
+    the first caller fetches the commit, the others wait for its result.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param str path: File to keep the commits in between runs.
+        """
+
+        self.path = path
+        self.commits = {}
+        self.pending = {}
+        self.changed = False
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    def __contains__(self, sha):
+        return sha in self.commits
+
+    def __len__(self):
+        return len(self.commits)
+
+    def get(self, sha):
+        return self.commits.get(sha)
+
+    def fetch(self, sha, fetch):
+        """
+        Get a commit from the store or fetch it, if it isn't there yet.
+        If the commit is already being fetched by another thread, wait
+        for it instead of fetching it again.
+
+        :param str sha: SHA of the commit.
+        :param fetch: Function to fetch the commit data for a SHA.
+        :rtype: dict
+        :return: dictionary with commit data (sha, author and committer)
+        """
+
+        with self.lock:
+            commit = self.commits.get(sha)
+            if commit:
+                return commit
+            event = self.pending.get(sha)
+            owner = event is None
+            if owner:
+                event = self.pending[sha] = threading.Event()
+        if not owner:
+            event.wait()
+            commit = self.commits.get(sha)
+            if commit:
+                return commit
+            # fetching failed in the other thread, try again
+            return self.fetch(sha, fetch)
+        try:
+            return self.put(fetch(sha))
+        finally:
+            with self.lock:
+                del self.pending[sha]
+            event.set()
+
+    def put(self, data):
+        """
+        Keep the dates of a commit.
+
+        :param dict data: commit data from GitHub (sha, author and committer)
+        :rtype: dict
+        :return: dictionary with commit data (sha, author and committer)
+        """
+
+        commit = {
+            "sha": data["sha"],
+            "author": {"date": data["author"]["date"]},
+            "committer": {"date": data["committer"]["date"]},
+        }
+        with self.lock:
+            if commit != self.commits.get(commit["sha"]):
+                self.commits[commit["sha"]] = commit
+                self.changed = True
+        return commit
+
+    def load(self):
+        """ Load the stored commits, if the file exists. """
+
+        try:
+            with open(self.path, "rb") as fh:
+                data = json.loads(fh.read().decode("utf-8"))
+        except (IOError, OSError, ValueError):
+            return
+        if data.get("version") != COMMIT_STORE_VERSION:
+            return
+        for sha, (author_date, committer_date) in data["commits"].items():
+            self.commits[sha] = {
+                "sha": sha,
+                "author": {"date": author_date},
+                "committer": {"date": committer_date},
+            }
+
+    def save(self):
+        """ Write the commits to disk, if new ones were added. """
+
+        if not self.path or not self.changed:
+            return
+        with self.lock:
+            data = {
+                "version": COMMIT_STORE_VERSION,
+                "commits": dict(
+                    (sha, [c["author"]["date"], c["committer"]["date"]])
+                    for sha, c in self.commits.items()
+                ),
+            }
+            self.changed = False
+        write_atomic(self.path, json.dumps(data).encode("utf-8"))
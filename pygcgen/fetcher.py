@@ -2,30 +2,34 @@
 
 from __future__ import absolute_import, division, print_function
 
-import os
 import re
 import sys
-import subprocess
-import threading
+from concurrent.futures import as_completed
+from itertools import islice
 if sys.version_info.major == 3:
     from builtins import object, range
-
-from agithub.GitHub import GitHub
-
+    from urllib.parse import urlencode
+else:
+    from urllib import urlencode
+
+from .archive import request_key
+from .commit_store import CommitStore
+from .governor import header_dict
+from .local_git import LocalGit
+from .metrics import Counters, Stats
 from .pygcgen_exceptions import GithubApiError
+from .records import CLOSING_EVENTS, Event, compact_events
+from .snapshot import Snapshot
+from .transport import Response
 
 
-GH_CFG_VARS = ["github.pygcgen.token", "github.token"]
 PER_PAGE_NUMBER = 100
-CHANGELOG_GITHUB_TOKEN = "CHANGELOG_GITHUB_TOKEN"
 GH_RATE_LIMIT_EXCEEDED_MSG = \
     "GitHub API rate limit exceeded, change log may be missing some issues. " \
     "Please provide a token with -t option or in git config."
-NO_TOKEN_PROVIDED = \
-    "Warning: No token provided. Neither -t option, git config or variable " \
-    "$CHANGELOG_GITHUB_TOKEN found. This script can make only " \
-    "50 requests to GitHub API per hour without token!"
 REPO_CREATED_TAG_NAME = "repo_created_at"
+# Headers stored in the response cache, needed to continue paging.
+CACHED_HEADERS = ["link"]
 
 
 class Fetcher(object):
@@ -34,48 +38,267 @@ class Fetcher(object):
     manipulation with related data (such as filtering, validating, e.t.c).
     """
 
-    def __init__(self, options):
+    def __init__(self, options, session):
+        """
+        :param options: parsed command line options
+        :param Session session: worker pool, rate limit governor, cache
+                                and token for the requests
+        """
+
         self.options = options
+        self.session = session
+        self.executor = session.executor
         self.first_issue = None
-        self.events_cnt = 0
-        self.fetch_github_token()
+        # time of the least recently updated pull request in the issues
+        self.oldest_pull_update = None
+        self.counters = Counters()
+        if not self.options.token:
+            self.options.token = session.token
         if isinstance(self.options.user, bytes):
             self.options.user = self.options.user.decode("utf8")
         if isinstance(self.options.project, bytes):
             self.options.project = self.options.project.decode("utf8")
-        if isinstance(self.options.token, bytes):
-            self.options.token = self.options.token.decode("utf8")
-        if options.token:
-            self.github = GitHub(
-                token=options.token,
-                api_url=options.github_endpoint
+        self.governor = session.governor
+        self.stats = Stats()
+        self.stats.sources["retries"] = lambda: self.governor.retried
+        self.stats.sources["rate_limit_wait"] = lambda: self.governor.waited
+        self.stats.gauges["rate_limit_remaining"] = \
+            lambda: self.governor.remaining
+        self.archive = session.archive
+        self.cache = session.cache
+        self.snapshot = None
+        if options.sync_file:
+            self.snapshot = Snapshot(options.sync_file, "{0}/{1}/{2}".format(
+                options.github_endpoint, self.options.user,
+                self.options.project
+            ))
+        commit_store = options.commit_store
+        if not commit_store and options.sync_file:
+            commit_store = options.sync_file + ".commits"
+        self.commits = CommitStore(commit_store)
+        # closing events from the events feed of the repository
+        self.repo_events = None
+        self.repo_events_oldest = None
+        self.local_git = None
+        if options.local_git and \
+                LocalGit.matches(self.options.user, self.options.project,
+                                 options.git_remote):
+            self.local_git = LocalGit()
+        self.aio = None
+        if options.engine == "asyncio":
+            from .async_fetcher import AsyncFetcher
+            self.aio = AsyncFetcher(self)
+
+    @property
+    def events_cnt(self):
+        """ Number of events fetched by the last fetch_events_async(). """
+        return self.counters.get("events")
+
+    @property
+    def github(self):
+        """
+        GitHub client of the session for the current thread.
+
+        :rtype: GitHub
+        """
+
+        return self.session.github(self.options.github_endpoint,
+                                   self.options.token or None)
+
+    def get(self, resource, immutable=False, **params):
+        """
+        GET a resource from GitHub, using the response cache if enabled.
+        The request is sent through the rate limit governor.
+
+        Cached responses are revalidated with a conditional request (ETag),
+        an unchanged resource is answered by GitHub with a 304, which
+        doesn't count against the rate limit. Immutable resources
+        (addressed by a SHA) are served from the cache without a request.
+
+        :param resource: agithub request, e.g. gh.repos[user][repo].tags
+        :param bool immutable: True, if the resource never changes.
+        :param params: Query parameters for the request.
+        :rtype: Response
+        :return: status code, data and headers of the response
+        """
+
+        gh = self.github
+        key = entry = None
+        headers = {}
+        if self.cache:
+            key, entry = self.cache_lookup(resource.url, params)
+            if entry and entry["immutable"]:
+                self.stats.counters.add("cache_hits")
+                return Response(200, entry["data"], entry["headers"])
+            headers = self.conditional_headers(entry)
+
+        def send():
+            rc, data = resource.get(headers=headers, **params)
+            self.stats.request(resource.url, gh.client.last_response_size())
+            return Response(rc, data, gh.getheaders())
+
+        response = self.call(request_key("GET", resource.url, params), send)
+        if self.cache:
+            return self.cache_response(key, entry, immutable, *response)
+        return response
+
+    def call(self, key, send):
+        """
+        Send a request through the rate limit governor. With --record,
+        the final response (after retries) is added to the archive,
+        with --replay it is served from there instead.
+
+        :param str key: Key of the request, see archive.request_key().
+        :param send: Function sending the request, returning a Response.
+        :rtype: Response
+        """
+
+        if self.archive:
+            return self.archive.call(key, lambda: self.governor.call(send))
+        return self.governor.call(send)
+
+    def cache_lookup(self, url, params):
+        """
+        Look up a request in the response cache.
+
+        :param str url: Path of the resource.
+        :param dict params: Query parameters for the request.
+        :rtype: str, dict
+        :return: cache key and cached entry (or None)
+        """
+
+        key = "{0}{1}?{2}".format(
+            self.options.github_endpoint, url,
+            urlencode(sorted(params.items()))
+        )
+        return key, self.cache.get(key)
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        :param dict entry: Cached entry (or None).
+        :rtype: dict
+        :return: Headers to revalidate the cached entry.
+        """
+
+        if entry and entry["etag"]:
+            return {"If-None-Match": entry["etag"]}
+        return {}
+
+    def cache_response(self, key, entry, immutable, rc, data, headers):
+        """
+        Store a response in the cache, or use the cached entry,
+        if GitHub answered the revalidation with 304 (Not Modified).
+
+        :rtype: Response
+        :return: status code, data and headers of the response
+        """
+
+        if rc == 304 and entry:
+            self.cache.touch(key)
+            self.stats.counters.add("cache_hits")
+            return Response(200, entry["data"], entry["headers"])
+        self.stats.counters.add("cache_misses")
+        if rc == 200:
+            etag = None
+            cached_headers = []
+            for k, v in headers:
+                if k.lower() == "etag":
+                    etag = v
+                elif k.lower() in CACHED_HEADERS:
+                    cached_headers.append([k, v])
+            self.cache.put(key, data, cached_headers, etag=etag,
+                           immutable=immutable)
+        return Response(rc, data, headers)
+
+    def iter_pages(self, resource, limit=None, until=None, parallel=True,
+                   **params):
+        """
+        Iterate over the items of all pages of a GitHub listing. The
+        items of a page are yielded as soon as the page arrived.
+
+        After the first page, the number of pages is known from the
+        Link rel="last" header and the remaining pages are fetched
+        simultaneously with the worker pool.
+
+        :param resource: function returning the agithub request for a
+                         GitHub client, e.g. lambda gh: gh.repos[u][r].tags
+        :param int limit: Only fetch the pages needed for this many items.
+        :param until: Function called with the data of each page, stop
+                      fetching when it returns True. Pages are fetched
+                      one after another then.
+        :param bool parallel: False, to fetch the pages one after another
+                              (needed when called from the worker pool).
+        :param params: Query parameters for the request.
+        :rtype: generator
+        :return: items of all pages, in order
+        """
+
+        verbose = self.options.verbose
+
+        def fetch(page):
+            rc, data, headers = self.get(
+                resource(self.github),
+                page=page, per_page=PER_PAGE_NUMBER, **params
             )
-        else:
-            self.github = GitHub(api_url=options.github_endpoint)
+            if rc != 200:
+                self.raise_GitHubError(rc, data, headers)
+            return data, headers
 
-    def fetch_github_token(self):
+        if verbose > 2:
+            print(".", end="")
+        data, headers = fetch(1)
+        for item in data:
+            yield item
+        count = len(data)
+        last_page = LastPage(headers)
+        if limit:
+            last_page = min(last_page, -(-limit // PER_PAGE_NUMBER))
+        if parallel and not until and last_page > 1:
+            futures = [self.executor.submit(fetch, page)
+                       for page in range(2, last_page + 1)]
+            for future in futures:
+                data, _ = future.result()
+                if verbose > 2:
+                    print(".", end="")
+                for item in data:
+                    yield item
+            return
+
+        page = NextPage(headers)
+        while page > 0:
+            if (limit and count >= limit) or (until and until(data)):
+                break
+            if verbose > 2:
+                print(".", end="")
+            data, headers = fetch(page)
+            for item in data:
+                yield item
+            count += len(data)
+            page = NextPage(headers)
+
+    def get_pages(self, resource, **kwargs):
         """
-        Fetch GitHub token. First try to use variable provided
-        by --token option, otherwise try to fetch it from git config
-        and last CHANGELOG_GITHUB_TOKEN env variable.
+        GET all pages of a GitHub listing.
 
-        :returns: Nothing
+        :param resource: see iter_pages()
+        :param kwargs: see iter_pages()
+        :rtype: list
+        :return: items of all pages, in order
         """
 
-        if not self.options.token:
-            try:
-                for v in GH_CFG_VARS:
-                    cmd = ['git', 'config', '--get', '{0}'.format(v)]
-                    self.options.token = subprocess.Popen(
-                        cmd, stdout=subprocess.PIPE).communicate()[0].strip()
-                    if self.options.token:
-                        break
-            except (subprocess.CalledProcessError, WindowsError):
-                pass
-        if not self.options.token:
-            self.options.token = os.environ.get(CHANGELOG_GITHUB_TOKEN)
-        if not self.options.token:
-            print(NO_TOKEN_PROVIDED)
+        return list(self.iter_pages(resource, **kwargs))
+
+    def iter_tags(self):
+        """
+        Iterate over all tags of the repository, page by page.
+
+        :rtype: generator
+        """
+
+        user = self.options.user
+        repo = self.options.project
+        return self.iter_pages(lambda gh: gh.repos[user][repo].tags)
 
     def get_all_tags(self):
         """
@@ -86,24 +309,10 @@ class Fetcher(object):
         """
 
         verbose = self.options.verbose
-        gh = self.github
-        user = self.options.user
-        repo = self.options.project
         if verbose:
             print("Fetching tags...")
 
-        tags = []
-        page = 1
-        while page > 0:
-            if verbose > 2:
-                print(".", end="")
-            rc, data = gh.repos[user][repo].tags.get(
-                page=page, per_page=PER_PAGE_NUMBER)
-            if rc == 200:
-                tags.extend(data)
-            else:
-                self.raise_GitHubError(rc, data, gh.getheaders())
-            page = NextPage(gh)
+        tags = list(self.iter_tags())
         if verbose > 2:
             print(".")
 
@@ -116,97 +325,211 @@ class Fetcher(object):
             print("Found {} tag(s)".format(len(tags)))
         return tags
 
-    def fetch_closed_issues_and_pr(self):
+    def iter_closed_issues(self, closed_after=None, milestones=()):
         """
-        This method fetches all closed issues and separate them to
-        pull requests and pure issues (pull request is kind of issue
-        in term of GitHub).
-
-        :rtype: list, list
-        :return: issues, pull-requests
+        Iterate over all closed issues and pull requests (pull request is
+        kind of issue in term of GitHub), newest first. The issues are
+        yielded page by page, as they arrive.
+
+        If a snapshot from a previous sync exists (--sync-file), only
+        the issues updated since then are fetched and merged into it.
+
+        With closed_after and no snapshot, the issues are listed by the
+        time of their last update, until the rest of the listing was
+        updated (so also closed) before that date. Only the closed issues
+        of the milestones are fetched additionally, they go to the tag of
+        their milestone regardless of their closing date. A new snapshot
+        is seeded by the full listing instead.
+
+        :param str closed_after: ISO date string, issues closed before
+                                 can't be in the change log.
+        :param milestones: Titles of milestones, whose issues are needed
+                           even if they were closed before closed_after.
+        :rtype: generator
         """
 
         verbose = self.options.verbose
-        gh = self.github
         user = self.options.user
         repo = self.options.project
+        max_issues = self.options.max_issues
+        since = self.snapshot.issues_synced_at if self.snapshot else None
+        # the newest max_issues have to be listed by creation time, a new
+        # snapshot needs all issues
+        windowed = closed_after and not self.snapshot and \
+            max_issues == sys.maxsize
         if verbose:
-            print("Fetching closed issues and pull requests...")
+            if since:
+                print("Fetching issues and pull requests updated "
+                      "since {}...".format(since))
+            elif windowed:
+                print("Fetching issues and pull requests closed "
+                      "after {}...".format(closed_after))
+            else:
+                print("Fetching closed issues and pull requests...")
 
-        data = []
-        issues = []
-        data = []
-        page = 1
-        while page > 0:
-            if verbose > 2:
-                print(".", end="")
-            rc, data = gh.repos[user][repo].issues.get(
-                page=page, per_page=PER_PAGE_NUMBER,
+        def resource(gh):
+            return gh.repos[user][repo].issues
+
+        if since:
+            # 'all', to notice issues that have been reopened
+            issues = self.iter_pages(
+                resource, state='all', filter='all', since=since
+            )
+        elif windowed:
+            # an issue is updated when it's closed, so the listing can
+            # stop at the first page ending before closed_after
+            issues = self.iter_pages(
+                resource, state='closed', filter='all', sort='updated',
+                direction='desc',
+                until=lambda data: data and
+                data[-1]["updated_at"] < closed_after
+            )
+        else:
+            # a new snapshot needs all issues, later runs only fetch the
+            # updated ones; max_issues is applied after merging
+            issues = self.iter_pages(
+                resource, limit=None if self.snapshot else max_issues,
                 state='closed', filter='all'
             )
-            if rc == 200:
-                issues.extend(data)
-            else:
-                self.raise_GitHubError(rc, data, gh.getheaders())
-            if len(issues) >= self.options.max_issues:
-                break
-            page = NextPage(gh)
-        self.first_issue = data[-1] if len(data) > 0 else []
-        if verbose > 2:
+
+        if self.snapshot:
+            issues = list(issues)
+            if verbose > 2:
+                print(".")
+            if verbose > 1:
+                print("\treceived {} updated issues.".format(len(issues)))
+            issues = self.snapshot.merge_issues(issues)
+            # copies, so the snapshot doesn't get modified by the Generator
+            issues = (dict(i) for i in issues)
+        elif windowed:
+            issues = [i for i in issues
+                      if is_needed(i, closed_after, milestones)]
+            numbers = set(i["number"] for i in issues)
+            issues.extend(i for i in self.iter_milestone_issues(milestones)
+                          if i["number"] not in numbers)
+            # back to the order of the listing by creation time
+            issues.sort(key=lambda i: (i["created_at"], i["number"]),
+                        reverse=True)
+
+        # the listing of pull requests can stop early, too
+        limited = not self.snapshot and (closed_after or
+                                         max_issues != sys.maxsize)
+        self.first_issue = []
+        self.oldest_pull_update = None
+        for issue in islice(issues, max_issues):
+            self.first_issue = issue
+            if closed_after and not is_needed(issue, closed_after,
+                                              milestones):
+                continue
+            if "pull_request" in issue and limited and (
+                    not self.oldest_pull_update or
+                    issue["updated_at"] < self.oldest_pull_update):
+                self.oldest_pull_update = issue["updated_at"]
+            yield issue
+        if verbose > 2 and not self.snapshot:
             print(".")
 
+    def iter_milestone_issues(self, titles):
+        """
+        Iterate over the closed issues and pull requests of milestones.
+
+        :param titles: Titles of the milestones.
+        :rtype: generator
+        """
+
+        user = self.options.user
+        repo = self.options.project
+        titles = set(titles)
+        if not titles:
+            return
+        milestones = self.get_pages(
+            lambda gh: gh.repos[user][repo].milestones, state='all'
+        )
+        for milestone in milestones:
+            if milestone["title"] in titles:
+                for issue in self.iter_pages(
+                        lambda gh: gh.repos[user][repo].issues,
+                        state='closed', filter='all',
+                        milestone=milestone["number"]):
+                    yield issue
+
+    def fetch_closed_issues_and_pr(self):
+        """
+        This method fetches all closed issues and separate them to
+        pull requests and pure issues (pull request is kind of issue
+        in term of GitHub).
+
+        :rtype: list, list
+        :return: issues, pull-requests
+        """
+
         # separate arrays of issues and pull requests:
         prs = []
         iss = []
-        for i in issues:
+        for i in self.iter_closed_issues():
             if "pull_request" in i:
                 prs.append(i)
             else:
                 iss.append(i)
-        if verbose > 1:
+        if self.options.verbose > 1:
             print("\treceived {} issues and  {} pull requests.".format(
                 len(iss), len(prs))
             )
         return iss, prs
 
-    def fetch_closed_pull_requests(self):
+    def iter_closed_pull_requests(self):
         """
-        Fetch all pull requests. We need them to detect "merged_at" parameter
+        Iterate over all closed pull requests (only those into
+        --release-branch, if given), page by page.
 
-        :rtype: list
-        :return: all pull requests
+        :rtype: generator
         """
 
-        pull_requests = []
         verbose = self.options.verbose
-        gh = self.github
         user = self.options.user
         repo = self.options.project
+        since = None
+        params = dict(state='closed')
+        if self.snapshot and \
+                self.snapshot.pulls_base == self.options.release_branch:
+            since = self.snapshot.pulls_synced_at
+        elif self.oldest_pull_update:
+            # only the pull requests of the listed issues are needed
+            since = self.oldest_pull_update
+        if since:
+            # the pulls endpoint has no 'since', so fetch the most recently
+            # updated first and stop at that time.
+            params.update(sort='updated', direction='desc')
+        if self.options.release_branch:
+            params.update(base=self.options.release_branch)
         if verbose:
             print("Fetching closed pull requests...")
-        page = 1
-        while page > 0:
-            if verbose > 2:
-                print(".", end="")
-
-            if self.options.release_branch:
-                rc, data = gh.repos[user][repo].pulls.get(
-                    page=page, per_page=PER_PAGE_NUMBER, state='closed',
-                    base=self.options.release_branch
-                )
-            else:
-                rc, data = gh.repos[user][repo].pulls.get(
-                    page=page, per_page=PER_PAGE_NUMBER, state='closed',
-                )
-
-            if rc == 200:
-                pull_requests.extend(data)
-            else:
-                self.raise_GitHubError(rc, data, gh.getheaders())
-            page = NextPage(gh)
+        pull_requests = self.iter_pages(
+            lambda gh: gh.repos[user][repo].pulls,
+            until=(lambda data: data and data[-1]["updated_at"] < since)
+            if since else None,
+            **params
+        )
+        if self.snapshot:
+            pull_requests = list(self.snapshot.merge_pulls(
+                list(pull_requests), self.options.release_branch
+            ))
+        for pr in pull_requests:
+            yield pr
         if verbose > 2:
             print(".")
-        if verbose > 1:
+
+    def fetch_closed_pull_requests(self):
+        """
+        Fetch all pull requests. We need them to detect "merged_at",
+        "merge_commit_sha" and "base" parameters.
+
+        :rtype: list
+        :return: all pull requests
+        """
+
+        pull_requests = list(self.iter_closed_pull_requests())
+        if self.options.verbose > 1:
             print("\tfetched {} closed pull requests.".format(
                 len(pull_requests))
             )
@@ -222,68 +545,193 @@ class Fetcher(object):
         gh = self.github
         user = self.options.user
         repo = self.options.project
-        rc, data = gh.repos[user][repo].get()
+        rc, data, headers = self.get(gh.repos[user][repo])
         if rc == 200:
             return REPO_CREATED_TAG_NAME, data["created_at"]
         else:
-            self.raise_GitHubError(rc, data, gh.getheaders())
+            self.raise_GitHubError(rc, data, headers)
         return None, None
 
-    def fetch_events_async(self, issues, tag_name):
+    def fetch_events_async(self, issues, tag_name, since=None, needed=None):
         """
         Fetch events for all issues and add them to self.events
 
+        With "--events repository", the closing events are taken from
+        the events feed of the repository, only issues not covered by
+        the feed are fetched one by one.
+
         :param list issues: all issues
         :param str tag_name: name of the tag to fetch events for
+        :param str since: With the events feed, events before this date
+                          (ISO date string) aren't needed.
+        :param needed: Function telling, if the events of an issue are
+                       needed. The others only get the events known
+                       without requests (from the snapshot or the feed).
         :returns: Nothing
         """
 
         if not issues:
             return issues
 
-        max_simultaneous_requests = self.options.max_simultaneous_requests
         verbose = self.options.verbose
-        gh = self.github
-        user = self.options.user
-        repo = self.options.project
-        self.events_cnt = 0
+        self.counters.reset("events")
+        if self.options.events == "repository":
+            issues = [i for i in issues if not self.events_from_snapshot(i)]
+            if issues:
+                self.fetch_repo_events(since)
+                issues = [i for i in issues if not self.events_from_feed(i)]
+            if not issues:
+                return issues
+        if needed:
+            issues = [i for i in issues
+                      if not self.events_from_snapshot(i) and needed(i)]
+            if not issues:
+                return issues
         if verbose:
             print("fetching events for {} {}... ".format(
                 len(issues), tag_name)
             )
+        if self.aio:
+            self.aio.run(self.aio.fetch_events_for_issues(issues))
+        else:
+            self.run_parallel(self.fetch_events, issues)
+        if verbose > 2:
+            print(".")
 
-        def worker(issue):
-            page = 1
-            issue['events'] = []
-            while page > 0:
-                rc, data = gh.repos[user][repo].issues[
-                    issue['number']].events.get(
-                    page=page, per_page=PER_PAGE_NUMBER)
-                if rc == 200:
-                    issue['events'].extend(data)
-                    self.events_cnt += len(data)
-                else:
-                    self.raise_GitHubError(rc, data, gh.getheaders())
-                page = NextPage(gh)
-
-        threads = []
-        cnt = len(issues)
-        for i in range(0, (cnt // max_simultaneous_requests) + 1):
-            for j in range(max_simultaneous_requests):
-                idx = i * max_simultaneous_requests + j
-                if idx == cnt:
-                    break
-                t = threading.Thread(target=worker, args=(issues[idx],))
-                threads.append(t)
-                t.start()
-                if verbose > 2:
-                    print(".", end="")
-                    if not idx % PER_PAGE_NUMBER:
-                        print("")
-            for t in threads:
-                t.join()
+    def fetch_events(self, issue):
+        """
+        Fetch all events of an issue.
+
+        :param dict issue: issue to add the events to
+        :returns: Nothing
+        """
+
+        if self.events_from_snapshot(issue):
+            return
+        events = list(self.iter_events(issue))
+        self.counters.add("events", len(events))
+        issue['events'] = compact_events(events)
+        self.events_to_snapshot(issue)
+
+    def iter_events(self, issue):
+        """
+        Iterate over the events of an issue, page by page.
+
+        :param dict issue: issue to fetch the events of
+        :rtype: generator
+        """
+
+        user = self.options.user
+        repo = self.options.project
+        number = issue['number']
+        # used from the worker pool, so fetch the pages in turn
+        return self.iter_pages(
+            lambda gh: gh.repos[user][repo].issues[number].events,
+            parallel=False
+        )
+
+    def fetch_repo_events(self, since=None):
+        """
+        Fetch the events feed of the repository (newest first) once and
+        index the "closed" and "merged" events by issue number.
+
+        :param str since: Stop at events older than this date
+                          (ISO date string).
+        :returns: Nothing
+        """
+
+        if self.repo_events is not None:
+            return
+        verbose = self.options.verbose
+        user = self.options.user
+        repo = self.options.project
+        if verbose:
+            print("Fetching events of the repository{}...".format(
+                " since {}".format(since) if since else ""))
+        feed = self.get_pages(
+            lambda gh: gh.repos[user][repo].issues.events,
+            until=(lambda data: data and data[-1]["created_at"] < since)
+            if since else None
+        )
         if verbose > 2:
             print(".")
+        self.repo_events = {}
+        for event in reversed(feed):
+            if event["event"] in CLOSING_EVENTS and event.get("issue"):
+                number = event["issue"]["number"]
+                self.repo_events.setdefault(number, []).append(
+                    Event.from_api(event)
+                )
+        self.repo_events_oldest = None
+        if since and feed and feed[-1]["created_at"] < since:
+            # stopped early, older events are missing
+            self.repo_events_oldest = feed[-1]["created_at"]
+        if verbose > 1:
+            print("\treceived {} events, {} closing events.".format(
+                len(feed), sum(len(e) for e in self.repo_events.values())))
+
+    def events_from_feed(self, issue):
+        """
+        Use the events from the events feed of the repository, if the
+        feed goes back far enough to have the last closing event.
+
+        :param dict issue: issue to add the events to
+        :rtype: bool
+        :return: True, if the events were found in the feed
+        """
+
+        events = self.repo_events.get(issue['number'])
+        if not events:
+            return False
+        oldest = self.repo_events_oldest
+        if oldest and not issue['closed_at'] > oldest:
+            return False
+        issue['events'] = tuple(events)
+        self.counters.add("events", len(events))
+        self.events_to_snapshot(issue)
+        return True
+
+    def run_parallel(self, func, items):
+        """
+        Call func for every item with the worker pool (executor) and
+        wait for all calls to finish. If a call raised an exception,
+        it is raised again here.
+
+        :param func: function to call with each item
+        :param items: iterable with items
+        :rtype: list
+        :return: results of the calls, in order of the items
+        """
+
+        futures = [self.executor.submit(func, item) for item in items]
+        if self.options.verbose > 2:
+            for idx, _ in enumerate(as_completed(futures), start=1):
+                print(".", end="")
+                if not idx % PER_PAGE_NUMBER:
+                    print("")
+        return [future.result() for future in futures]
+
+    def events_from_snapshot(self, issue):
+        """
+        Use the events stored in the snapshot, if the issue didn't change.
+
+        :param dict issue: issue to add the events to
+        :rtype: bool
+        :return: True, if the events were found in the snapshot
+        """
+
+        if self.snapshot:
+            events = self.snapshot.get_events(issue['number'])
+            if events is not None:
+                issue['events'] = compact_events(events)
+                return True
+        return False
+
+    def events_to_snapshot(self, issue):
+        if self.snapshot:
+            self.snapshot.set_events(
+                issue['number'], [e.as_dict() for e in issue['events']]
+            )
 
     def fetch_date_of_tag(self, tag):
         """
@@ -296,15 +744,8 @@ class Fetcher(object):
 
         if self.options.verbose > 1:
             print("\tFetching date for tag {}".format(tag["name"]))
-        gh = self.github
-        user = self.options.user
-        repo = self.options.project
-
-        rc, data = gh.repos[user][repo].git.commits[
-            tag["commit"]["sha"]].get()
-        if rc == 200:
-            return data["committer"]["date"]
-        self.raise_GitHubError(rc, data, gh.getheaders())
+        commit = self.fetch_commit({"commit_id": tag["sha"]})
+        return commit["committer"]["date"]
 
     def fetch_commit(self, event):
         """
@@ -312,49 +753,159 @@ class Fetcher(object):
 
         :param dict event: dictionary with event information
         :rtype: dict
-        :return: dictionary with commit data
+        :return: dictionary with commit data (sha, author and committer)
         """
 
+        return self.commits.fetch(event["commit_id"], self.get_commit)
+
+    def get_commit(self, sha):
+        """
+        Fetch a commit from the local clone or GitHub, use fetch_commit()
+        to avoid fetching the same commit again.
+
+        :param str sha: SHA of the commit
+        :rtype: dict
+        :return: commit data from GitHub
+        """
+
+        if self.local_git:
+            commit = self.local_git.get(sha)
+            if commit:
+                return commit
         gh = self.github
         user = self.options.user
         repo = self.options.project
 
-        rc, data = gh.repos[user][repo].git.commits[
-            event["commit_id"]].get()
+        rc, data, headers = self.get(
+            gh.repos[user][repo].git.commits[sha], immutable=True
+        )
         if rc == 200:
             return data
-        self.raise_GitHubError(rc, data, gh.getheaders())
+        self.raise_GitHubError(rc, data, headers)
+
+    def commit_from_local_git(self, sha):
+        """
+        Get a commit from the local clone, if it is there.
+
+        :param str sha: SHA of the commit
+        :rtype: dict
+        :return: dictionary with commit data (sha, author and committer)
+                 or None
+        """
+
+        if self.local_git:
+            commit = self.local_git.get(sha)
+            if commit:
+                return self.commits.put(commit)
+        return None
+
+    def fetch_commits(self, shas):
+        """
+        Fetch the commits for all given SHAs at once. Later calls of
+        fetch_commit for these SHAs don't need a request.
+
+        :param shas: SHAs of the commits
+        :returns: Nothing
+        """
+
+        shas = set(
+            sha for sha in shas
+            if sha not in self.commits and not self.commit_from_local_git(sha)
+        )
+        if not shas:
+            return
+        if self.options.verbose > 1:
+            print("\tFetching {} commits".format(len(shas)))
+        if self.aio:
+            self.aio.run(self.aio.fetch_commits(shas))
+        else:
+            self.run_parallel(
+                lambda sha: self.fetch_commit({"commit_id": sha}), shas
+            )
+
+    def save_commits(self):
+        """ Store the fetched commits for the next run. """
+
+        if self.commits.path:
+            if self.options.verbose > 1:
+                print("\tsaving {} commits to {}".format(
+                    len(self.commits), self.commits.path))
+            self.commits.save()
+
+    def save_snapshot(self):
+        """ Store the snapshot for the next incremental sync. """
+
+        if self.snapshot:
+            if self.options.verbose > 1:
+                print("\tsaving snapshot to {}".format(self.options.sync_file))
+            self.snapshot.save()
 
     @staticmethod
     def raise_GitHubError(rc, data, header):
-        hdr = dict(header)
+        hdr = header_dict(header)
         if rc == 403 and hdr.get("x-ratelimit-remaining") == '0':
-            # TODO: add auto-retry
             raise GithubApiError(GH_RATE_LIMIT_EXCEEDED_MSG)
         raise GithubApiError("({0}) {1}".format(rc, data["message"]))
 
 
-def NextPage(gh):
+def NextPage(headers):
     """
     Checks if a GitHub call returned multiple pages of data.
 
-    :param gh: GitHub() instance
+    :param list headers: headers of the response
     :rtype: int
     :return: number of next page or 0 if no next page
     """
-    header = dict(gh.getheaders())
+    return LinkPage(headers, "next")
+
+
+def LastPage(headers):
+    """
+    Get the number of the last page of a GitHub listing.
+
+    :param list headers: headers of the response
+    :rtype: int
+    :return: number of last page or 0 if there is only one page
+    """
+    return LinkPage(headers, "last")
+
+
+def LinkPage(headers, rel):
+    """
+    Get the page number of a relation in the Link header.
+
+    :param list headers: headers of the response
+    :param str rel: relation, e.g. "next" or "last"
+    :rtype: int
+    :return: number of the page or 0 if the relation doesn't exist
+    """
+    header = dict(headers)
     if 'Link' in header:
         parts = header['Link'].split(',')
         for part in parts:
             subparts = part.split(';')
             sub = subparts[1].split('=')
             if sub[0].strip() == 'rel':
-                if sub[1] == '"next"':
+                if sub[1] == '"{0}"'.format(rel):
                     page = int(
                         re.match(
-                            r'.*page=(\d+).*', subparts[0],
+                            r'.*[?&]page=(\d+).*', subparts[0],
                             re.IGNORECASE | re.DOTALL | re.UNICODE
                         ).groups()[0]
                     )
                     return page
     return 0
+
+
+def is_needed(issue, closed_after, milestones):
+    """
+    Check if an issue can be in a change log, that starts at a date.
+
+    :param dict issue: issue as received from GitHub
+    :param str closed_after: ISO date string of the start of the log
+    :param milestones: titles of the milestones of the tags in the log
+    :rtype: bool
+    """
+    milestone = issue.get("milestone")
+    return (issue.get("closed_at") or "") > closed_after or \
+        bool(milestone and milestone["title"] in milestones)
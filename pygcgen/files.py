@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import threading
+
+# os.replace is atomic on all platforms, but doesn't exist in Python 2.
+_replace = getattr(os, "replace", os.rename)
+
+
+def write_atomic(path, content):
+    """
+    Write a file through a temporary file, so readers (and a run that is
+    interrupted) never see it half written.
+
+    :param str path: Name of the file.
+    :param bytes content: New content of the file.
+    """
+
+    # one per thread, for files written by several workers
+    tmp_path = "{0}.{1}.tmp".format(path, threading.current_thread().ident)
+    with open(tmp_path, "wb") as fh:
+        fh.write(content)
+    _replace(tmp_path, path)
@@ -2,21 +2,23 @@
 
 from __future__ import division, print_function
 
-import copy
 import datetime
 import re
 import sys
-import threading
 import warnings
 
+from bisect import bisect_left
 from collections import OrderedDict
 
 import dateutil.tz
 from dateutil.parser import parse as dateutil_parser
 
 from .fetcher import Fetcher, REPO_CREATED_TAG_NAME
+from .graphql_fetcher import GraphQLFetcher
 from .pygcgen_exceptions import ChangelogGeneratorError
 from .reader import read_changelog
+from .records import Event, Issue, PullRequest, Tag
+from .session import Session
 
 if sys.version_info.major == 3:
     # noinspection PyCompatibility
@@ -45,34 +47,100 @@ class Generator(object):
     change log generation from ready-to-parse issues.
     """
 
-    def __init__(self, options):
+    def __init__(self, options, session=None):
+        """
+        :param options: parsed command line options
+        :param Session session: session to share with other generators,
+                                by default the generator has its own
+        """
+
         self.options = options
         self.tag_times_dict = {}
         self.issues = []
-        self.issues2 = []
         self.pull_requests = []
         self.all_tags = []
+        # all tags, except the ones excluded by name
+        self.named_tags = []
         self.filtered_tags = []
-        self.fetcher = Fetcher(options)
+        # ISO date, before which closed issues can't be in the log
+        self.log_start = None
+        # times of the tags between the sections, see needs_exact_date()
+        self.boundaries = []
+        # (older tag, newer tag) -> issues, pull requests of the section
+        self.buckets = {}
+        # milestone -> issues, pull requests with that milestone
+        self.milestone_items = {}
+        self.own_session = session is None
+        self.session = Session(options) if session is None else session
+        self.executor = self.session.executor
+        if options.backend == "graphql":
+            self.fetcher = GraphQLFetcher(options, self.session)
+        else:
+            self.fetcher = Fetcher(options, self.session)
+        self.stats = self.fetcher.stats
 
     def fetch_and_filter_issues_and_pr(self):
-        issues, pull_requests = self.fetcher.fetch_closed_issues_and_pr()
-
-        if self.options.verbose:
+        options = self.options
+        if options.verbose:
             print("Filtering issues and pull requests...")
-        self.pull_requests = []
-        if self.options.include_pull_request:
-            self.pull_requests = self.get_filtered_pull_requests(pull_requests)
 
-        self.issues = []
-        if self.options.issues:
-            self.issues = self.filter_by_labels(issues, "issues")
+        # filter by labels while the pages are still arriving
+        received = {"issues": 0, "pull requests": 0}
+        issues = []
+        pull_requests = []
+        self.log_start = self.log_start_date()
+        milestones = ()
+        if self.log_start and options.filter_issues_by_milestone:
+            milestones = [tag["name"] for tag in self.filtered_tags]
+            milestones.append(options.unreleased_label)
+        with self.stats.phase("issues"):
+            for data in self.fetcher.iter_closed_issues(self.log_start,
+                                                        milestones):
+                if "pull_request" in data:
+                    received["pull requests"] += 1
+                    if options.include_pull_request:
+                        pr = PullRequest.from_api(data)
+                        if self.matches_labels(pr):
+                            pull_requests.append(pr)
+                else:
+                    received["issues"] += 1
+                    if options.issues:
+                        issue = Issue.from_api(data)
+                        if self.matches_labels(issue):
+                            issues.append(issue)
+        if options.verbose > 1:
+            print("\treceived {} issues and  {} pull requests.".format(
+                received["issues"], received["pull requests"])
+            )
+            if options.issues:
+                print("\tremaining issues: {}".format(len(issues)))
+            if options.include_pull_request:
+                print("\tremaining pull requests: {}".format(
+                    len(pull_requests))
+                )
 
-        self.fetch_events_for_issues_and_pr()
-        self.issues = self.detect_actual_closed_dates(self.issues, "issues")
-        self.pull_requests = self.detect_actual_closed_dates(
-            self.pull_requests, "pull requests"
-        )
+        self.issues = issues
+        self.pull_requests = []
+        if options.include_pull_request:
+            with self.stats.phase("pull requests"):
+                self.pull_requests = self.filter_merged_pull_requests(
+                    pull_requests
+                )
+            if options.verbose > 1:
+                print("\tremaining pull requests: {}".format(
+                    len(self.pull_requests))
+                )
+
+        with self.stats.phase("events"):
+            self.fetch_events_for_issues_and_pr()
+        with self.stats.phase("closed dates"):
+            self.issues = self.detect_actual_closed_dates(
+                self.issues, "issues"
+            )
+            self.pull_requests = self.detect_actual_closed_dates(
+                self.pull_requests, "pull requests"
+            )
+        self.fetcher.save_snapshot()
 
     def fetch_events_for_issues_and_pr(self):
         """
@@ -81,38 +149,97 @@ class Generator(object):
         @return [Array] array of fetched issues
         """
 
+        since = None
+        if self.options.events == "repository":
+            since = self.log_start
+        needed = None
+        if self.options.date_resolution == "lazy":
+            self.boundaries = self.section_boundaries()
+            needed = self.needs_exact_date
         # Async fetching events:
-        self.fetcher.fetch_events_async(self.issues, "issues")
-        self.fetcher.fetch_events_async(self.pull_requests, "pull requests")
+        self.fetcher.fetch_events_async(self.issues, "issues", since, needed)
+        if self.options.pr_date_source == "events":
+            self.fetcher.fetch_events_async(self.pull_requests,
+                                            "pull requests", since, needed)
+
+    def section_boundaries(self):
+        """
+        :rtype: list(datetime)
+        :return: sorted times of the tags, that separate the sections
+        """
+
+        times = [self.get_time_of_tag(tag) for tag in self.filtered_tags]
+        if self.log_start:
+            times.append(timestring_to_datetime(self.log_start))
+        return sorted(times)
+
+    def needs_exact_date(self, issue):
+        """
+        With --date-resolution lazy, only issues closed within
+        --date-margin after a tag need their events and closing commit:
+        the commit may be older than the tag, so the issue may belong to
+        the section before. All others are dated by their closing.
+
+        :param dict issue: issue or pull request
+        :rtype: bool
+        """
+
+        if self.options.date_resolution != "lazy":
+            return True
+        closed = timestring_to_datetime(issue["closed_at"])
+        margin = datetime.timedelta(hours=self.options.date_margin)
+        index = bisect_left(self.boundaries, closed - margin)
+        return index < len(self.boundaries) and \
+            self.boundaries[index] < closed
+
+    def dated_by_closing(self, issue):
+        """
+        :param dict issue: issue or pull request
+        :rtype: bool
+        :return: True, if the date of the issue is its closing date,
+                 without looking at its events and commits
+        """
+
+        return not issue.get("events") and not self.needs_exact_date(issue)
+
+    def log_start_date(self):
+        """
+        Closed issues before the tag, that is older than all tags in the
+        log, can't be in the log. They are neither listed completely, nor
+        are their events needed.
+
+        :rtype: str
+        :return: ISO date string or None, if all issues can be in the log
+        """
+
+        if not self.filtered_tags:
+            return None
+        if self.options.unreleased_only:
+            older_tag = self.filtered_tags[0]
+        elif self.options.between_tags or self.options.since_tag:
+            older_tag = self.last_older_tag()
+        else:
+            return None
+        older_tag_date = self.get_time_of_tag(older_tag)
+        return older_tag_date.astimezone(dateutil.tz.tzutc()).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+
+    def fetch_tags_dates(self, tags):
+        """
+        Async fetching of the dates of tags.
 
-    def fetch_tags_dates(self):
-        """ Async fetching of all tags dates. """
+        :param list(dict) tags: Tags to fetch the dates of.
+        """
 
         if self.options.verbose:
-            print(
-                "Fetching dates for {} tags...".format(len(self.filtered_tags))
-            )
+            print("Fetching dates for {} tags...".format(len(tags)))
 
-        def worker(tag):
+        # fetch the commits of all tags at once, then
+        # get_time_of_tag finds the dates without further requests.
+        self.fetcher.fetch_commits(set(tag["sha"] for tag in tags))
+        for tag in tags:
             self.get_time_of_tag(tag)
-
-        # Async fetching tags:
-        threads = []
-        max_threads = 50
-        cnt = len(self.filtered_tags)
-        for i in range(0, (cnt // max_threads) + 1):
-            for j in range(max_threads):
-                idx = i * 50 + j
-                if idx == cnt:
-                    break
-                t = threading.Thread(target=worker,
-                                     args=(self.filtered_tags[idx],))
-                threads.append(t)
-                t.start()
-                if self.options.verbose > 2:
-                    print(".", end="")
-            for t in threads:
-                t.join()
         if self.options.verbose > 2:
             print(".")
         if self.options.verbose > 1:
@@ -123,35 +250,42 @@ class Generator(object):
     def detect_actual_closed_dates(self, issues, kind):
         """
         Find correct closed dates, if issues was closed by commits.
+        The dates are set on the given issues.
 
         :param list issues: issues to check
         :param str kind: either "issues" or "pull requests"
         :rtype: list
-        :return: issues with updated closed dates
+        :return: issues with a closed date
         """
 
         if self.options.verbose:
             print("Fetching closed dates for {} {}...".format(
                 len(issues), kind)
             )
-        all_issues = copy.deepcopy(issues)
-        for issue in all_issues:
+        self.fetcher.fetch_commits(
+            event["commit_id"] for event in map(
+                self.closing_event,
+                (i for i in issues if not self.dated_by_closing(i))
+            )
+            if event and event.get("commit_id")
+        )
+        dated_issues = []
+        for index, issue in enumerate(issues):
             if self.options.verbose > 2:
                 print(".", end="")
-                if not issues.index(issue) % 30:
+                if not index % 30:
                     print("")
             self.find_closed_date_by_commit(issue)
 
-            if not issue.get('actual_date', False):
-                if issue.get('closed_at', False):
-                    print("Skipping closed non-merged issue: #{0} {1}".format(
-                        issue["number"], issue["title"]))
-
-                all_issues.remove(issue)
+            if issue.get('actual_date', False):
+                dated_issues.append(issue)
+            elif issue.get('closed_at', False):
+                print("Skipping closed non-merged issue: #{0} {1}".format(
+                    issue["number"], issue["title"]))
 
         if self.options.verbose > 2:
             print(".")
-        return all_issues
+        return dated_issues
 
     def find_closed_date_by_commit(self, issue):
         """
@@ -161,25 +295,77 @@ class Generator(object):
         :param dict issue: issue to edit
         """
 
-        if not issue.get('events'):
+        if self.dated_by_closing(issue):
+            issue['actual_date'] = timestring_to_datetime(issue['closed_at'])
+            return
+        if not issue.get('events') and not self.uses_merge_data(issue):
             return
+        event = self.closing_event(issue)
+        if event:
+            self.set_date_from_event(event, issue)
+        else:
+            # TODO: assert issues, that remain without
+            #       'actual_date' hash for some reason.
+            print("\nWARNING: Issue without 'actual_date':"
+                  " #{0} {1}".format(issue["number"], issue["title"]))
+
+    def uses_merge_data(self, issue):
+        """
+        Check, if the date of an issue is taken from the merge data
+        instead of the events (pull requests with --pr-date-source pulls).
+
+        :param dict issue: issue or pull request
+        :rtype: bool
+        """
+
+        return self.options.pr_date_source == "pulls" and 'merged_at' in issue
+
+    def closing_event(self, issue):
+        """
+        Find the event, that closed the issue.
+
+        :param dict issue: issue or pull request
+        :rtype: dict
+        :return: closing event or None
+        """
+
+        if self.uses_merge_data(issue):
+            return self.find_merge_event(issue)
+        return self.find_closing_event(issue)
+
+    @staticmethod
+    def find_merge_event(pr):
+        """
+        Make the "merged" event of a pull request from its merge data.
+
+        :param PullRequest pr: pull request with "merged_at"
+        :rtype: Event
+        :return: "merged" event or None, if the pull request isn't merged
+        """
+
+        if not pr.get('merged_at'):
+            return None
+        return Event("merged", pr.get('merge_commit_sha'), pr['merged_at'])
+
+    @staticmethod
+    def find_closing_event(issue):
+        """
+        Find the event, that closed the issue.
+
+        :param dict issue: issue with events
+        :rtype: dict
+        :return: latest "merged" event of a PR, "closed" event of an issue
+        """
+
         # if it's PR -> then find "merged event", in case
         # of usual issue -> find closed date
         compare_string = "merged" if 'merged_at' in issue else "closed"
-        # reverse! - to find latest closed event. (event goes in date order)
+        # reversed! - to find latest closed event. (event goes in date order)
         # if it were reopened and closed again.
-        issue['events'].reverse()
-        found_date = False
-        for event in issue['events']:
+        for event in reversed(issue.get('events') or []):
             if event["event"] == compare_string:
-                self.set_date_from_event(event, issue)
-                found_date = True
-                break
-        if not found_date:
-            # TODO: assert issues, that remain without
-            #       'actual_date' hash for some reason.
-            print("\nWARNING: Issue without 'actual_date':"
-                  " #{0} {1}".format(issue["number"], issue["title"]))
+                return event
+        return None
 
     def set_date_from_event(self, event, issue):
         """
@@ -226,14 +412,33 @@ class Generator(object):
         """
 
         self.fetch_and_filter_tags()
-        tags_sorted = self.sort_tags_by_date(self.filtered_tags)
+        with self.stats.phase("tag dates"):
+            tags_sorted = self.sort_tags_by_date(self.filtered_tags)
         self.filtered_tags = tags_sorted
         self.fetch_and_filter_issues_and_pr()
 
+        with self.stats.phase("changelog"):
+            log = self.render_changelog()
+        self.fetcher.save_commits()
+        if self.own_session:
+            # a shared session is finished by its owner
+            self.session.save_archive()
+        return log
+
+    def render_changelog(self):
+        """
+        Generate the change log from the fetched tags, issues and pull
+        requests.
+
+        :rtype: str
+        :return: Generated change log file
+        """
+
         log = str(self.options.frontmatter) \
             if self.options.frontmatter else u""
         log += u"{0}\n\n".format(self.options.header)
 
+        self.bucket_sections()
         if self.options.unreleased_only:
             log += self.generate_unreleased_section()
         else:
@@ -246,6 +451,67 @@ class Generator(object):
             pass
         return log
 
+    def bucket_sections(self):
+        """
+        Sort the issues and pull requests into the sections between the
+        tags at once, instead of comparing all of them with the dates of
+        every section. Each one is found with bisect in the sorted times
+        of the tags, so it takes O((n + t) log t) for n issues and t tags.
+        The issues are grouped by milestone, too.
+        """
+
+        self.milestone_items = {}
+        for kind, items in enumerate((self.issues, self.pull_requests)):
+            for item in items:
+                if item.get("milestone"):
+                    self.milestone_items.setdefault(
+                        item["milestone"], ([], [])
+                    )[kind].append(item)
+        self.buckets = {}
+        if not self.filtered_tags:
+            return
+        # oldest first
+        tags = self.filtered_tags[::-1]
+        if self.options.unreleased_only:
+            tags = tags[-1:]
+        else:
+            tags.insert(0, self.last_older_tag())
+        if self.options.unreleased_only or self.options.with_unreleased:
+            head_tag = Tag(self.options.unreleased_label)
+            self.tag_times_dict[head_tag["name"]] = \
+                datetime.datetime.now(dateutil.tz.tzutc())
+            tags.append(head_tag)
+        times = [self.get_time_of_tag(tag) for tag in tags]
+        if any(older > newer for older, newer in zip(times, times[1:])):
+            # tags from the future, compare with every section
+            return
+        issues = self.bucket_by_time(self.issues, times)
+        pull_requests = self.bucket_by_time(self.pull_requests, times)
+        for index in range(1, len(tags)):
+            key = (tags[index - 1]["name"], tags[index]["name"])
+            self.buckets[key] = (issues[index], pull_requests[index])
+
+    @staticmethod
+    def bucket_by_time(issues, times):
+        """
+        Sort issues into the intervals between times.
+
+        :param list(dict) issues: Issues with "actual_date".
+        :param list(datetime) times: Sorted times of the tags.
+        :rtype: list(list(dict))
+        :return: For every time, the issues after the time before and up
+                 to it, in the order of **issues**. The first one holds
+                 the issues before the first time.
+        """
+
+        buckets = [[] for _ in times]
+        for issue in issues:
+            if issue.get('actual_date'):
+                index = bisect_left(times, issue['actual_date'])
+                if index < len(times):
+                    buckets[index].append(issue)
+        return buckets
+
     def generate_sub_section(self, issues, prefix):
         """
         Generate formated list of issues for changelog.
@@ -362,20 +628,33 @@ class Generator(object):
         :return: Filtered issues and pull requests.
         """
 
-        filtered_pull_requests = self.delete_by_time(self.pull_requests,
-                                                     older_tag, newer_tag)
-        filtered_issues = self.delete_by_time(self.issues, older_tag,
-                                              newer_tag)
+        bucket = None
+        if older_tag and newer_tag:
+            bucket = self.buckets.get((older_tag["name"], newer_tag["name"]))
+        if bucket:
+            # new lists, the sections get removed from them while rendering
+            filtered_issues = list(bucket[0])
+            filtered_pull_requests = list(bucket[1])
+        else:
+            filtered_pull_requests = self.delete_by_time(
+                self.pull_requests, older_tag, newer_tag
+            )
+            filtered_issues = self.delete_by_time(self.issues, older_tag,
+                                                  newer_tag)
 
         newer_tag_name = newer_tag["name"] if newer_tag else None
 
         if self.options.filter_issues_by_milestone:
+            # only the issues of the milestone can be added
+            issues, pull_requests = self.milestone_items.get(
+                newer_tag_name, ([], [])
+            )
             # delete excess irrelevant issues (according milestones).Issue #22.
             filtered_issues = self.filter_by_milestone(
-                filtered_issues, newer_tag_name, self.issues
+                filtered_issues, newer_tag_name, issues
             )
             filtered_pull_requests = self.filter_by_milestone(
-                filtered_pull_requests, newer_tag_name, self.pull_requests
+                filtered_pull_requests, newer_tag_name, pull_requests
             )
         return filtered_issues, filtered_pull_requests
 
@@ -389,7 +668,6 @@ class Generator(object):
 
         if self.options.verbose:
             print("Generating log...")
-        self.issues2 = copy.deepcopy(self.issues)
 
         log1 = ""
         if self.options.with_unreleased:
@@ -431,11 +709,20 @@ class Generator(object):
         return log2
 
     def last_older_tag(self):
-        older_tag = {"name": self.get_temp_tag_for_repo_creation()}
+        """
+        Find the tag before the oldest tag of the log, among the tags,
+        that aren't excluded.
+
+        :rtype: dict
+        :return: the tag or a special value, indicating the creation
+                 of the repo
+        """
+
+        older_tag = Tag(self.get_temp_tag_for_repo_creation())
         if self.options.between_tags or self.options.since_tag:
             older_tag_date = self.get_time_of_tag(older_tag)
             newer_tag_date = self.get_time_of_tag(self.filtered_tags[-1])
-            for tag in self.all_tags:
+            for tag in self.named_tags:
                 tag_date = self.get_time_of_tag(tag)
                 if older_tag_date < tag_date < newer_tag_date:
                     older_tag = tag
@@ -453,7 +740,7 @@ class Generator(object):
             return ""
         now = datetime.datetime.utcnow()
         now = now.replace(tzinfo=dateutil.tz.tzutc())
-        head_tag = {"name": self.options.unreleased_label}
+        head_tag = Tag(self.options.unreleased_label)
         self.tag_times_dict[head_tag["name"]] = now
         unreleased_log = self.generate_log_between_tags(
             self.filtered_tags[0], head_tag)
@@ -499,15 +786,15 @@ class Generator(object):
         if not issue.get("pull_request") or not self.options.author:
             return line
 
-        if not issue.get("user"):
+        if not issue.get("user_login"):
             line += u" (Null user)"
         elif self.options.username_as_tag:
             line += u" (@{0})".format(
-                issue["user"]["login"]
+                issue["user_login"]
             )
         else:
             line += u" ([{0}]({1}))".format(
-                issue["user"]["login"], issue["user"]["html_url"]
+                issue["user_login"], issue["user_url"]
             )
         return line
 
@@ -596,7 +883,7 @@ class Generator(object):
             for issue in issues:
                 is_labels = issue.get('labels')
                 if is_labels:
-                    is_lbls = set(l["name"] for l in is_labels)
+                    is_lbls = set(is_labels)
                     if is_lbls.intersection(set(sect_labels)):
                         sections_a[section].append(issue)
                         added_issues.append(issue)
@@ -612,7 +899,7 @@ class Generator(object):
             for pr in pull_requests:
                 pr_labels = pr.get('labels')
                 if pr_labels:
-                    pr_lbls = set(l["name"] for l in pr_labels)
+                    pr_lbls = set(pr_labels)
                     if pr_lbls.intersection(set(sect_labels)):
                         sections_a[section].append(pr)
                         added_pull_requests.append(pr)
@@ -629,14 +916,14 @@ class Generator(object):
         :return: Filtered issues.
         """
         if not self.options.exclude_labels:
-            return copy.deepcopy(issues)
+            return list(issues)
 
         remove_issues = set()
         exclude_labels = self.options.exclude_labels
         include_issues = []
         for issue in issues:
             for label in issue["labels"]:
-                if label["name"] in exclude_labels:
+                if label in exclude_labels:
                     remove_issues.add(issue["number"])
                     break
         for issue in issues:
@@ -674,9 +961,8 @@ class Generator(object):
         filtered = []
         for issue in all_issues:
             if issue.get("milestone"):
-                if issue["milestone"]["title"] == tag_name:
-                    iss = copy.deepcopy(issue)
-                    filtered.append(iss)
+                if issue["milestone"] == tag_name:
+                    filtered.append(issue)
         return filtered
 
     def remove_issues_in_milestones(self, filtered_issues):
@@ -691,7 +977,7 @@ class Generator(object):
             if issue["milestone"]:
                 # check, that this milestone is in tag list:
                 for tag in self.filtered_tags:
-                    if tag["name"] == issue["milestone"]["title"]:
+                    if tag["name"] == issue["milestone"]:
                         filtered_issues.remove(issue)
         return filtered_issues
 
@@ -712,7 +998,7 @@ class Generator(object):
 
         if not older_tag and not newer_tag:
             # in case if no tags are specified - return unchanged array
-            return copy.deepcopy(issues)
+            return list(issues)
 
         newer_tag_time = self.get_time_of_tag(newer_tag)
         older_tag_time = self.get_time_of_tag(older_tag)
@@ -721,7 +1007,7 @@ class Generator(object):
             if issue.get('actual_date'):
                 rslt = older_tag_time < issue['actual_date'] <= newer_tag_time
                 if rslt:
-                    filtered.append(copy.deepcopy(issue))
+                    filtered.append(issue)
         return filtered
 
     def include_issues_by_labels(self, all_issues):
@@ -769,27 +1055,59 @@ class Generator(object):
         """
 
         if not self.options.include_labels:
-            return copy.deepcopy(issues)
+            return list(issues)
         filtered_issues = []
         include_labels = set(self.options.include_labels)
         for issue in issues:
-            labels = [label["name"] for label in issue["labels"]]
-            if include_labels.intersection(labels):
+            if include_labels.intersection(issue["labels"]):
                 filtered_issues.append(issue)
         return filtered_issues
 
+    def matches_labels(self, issue):
+        """
+        Check a single issue against the include/exclude labels, with
+        the same rules as include_issues_by_labels() and
+        exclude_issues_by_labels().
+
+        :param dict issue: Issue to check.
+        :rtype: bool
+        :return: True, if the issue passes the label filters.
+        """
+
+        labels = set(issue["labels"])
+        include_labels = self.options.include_labels
+        if include_labels and not labels.intersection(include_labels):
+            if labels or self.options.add_issues_wo_labels:
+                return False
+        exclude_labels = self.options.exclude_labels
+        if exclude_labels and labels.intersection(exclude_labels):
+            return False
+        return True
+
+    def iter_filtered_by_labels(self, issues):
+        """
+        Filter issues for include/exclude labels, one by one.
+
+        :param issues: Issues, e.g. from Fetcher.iter_closed_issues().
+        :rtype: generator
+        :return: Issues, that pass the label filters.
+        """
+
+        for issue in issues:
+            if self.matches_labels(issue):
+                yield issue
+
     def filter_by_labels(self, all_issues, kind):
         """
         Filter issues for include/exclude labels.
 
-        :param list(dict) all_issues: All issues.
+        :param all_issues: All issues, a list or an iterator.
         :param str kind: Either "issues" or "pull requests".
         :rtype: list(dict)
         :return: Filtered issues.
         """
 
-        filtered_issues = self.include_issues_by_labels(all_issues)
-        filtered = self.exclude_issues_by_labels(filtered_issues)
+        filtered = list(self.iter_filtered_by_labels(all_issues))
         if self.options.verbose > 1:
             print("\tremaining {}: {}".format(kind, len(filtered)))
         return filtered
@@ -818,6 +1136,9 @@ class Generator(object):
         attributes for pull requests. Using merged date is more correct
         than closed date.
 
+        The closed pull requests are fetched once (only those merged into
+        --release-branch, if given) and joined by number.
+
         :param list(dict) pull_requests: Pre-filtered pull requests.
         :rtype: list(dict)
         :return:
@@ -829,19 +1150,18 @@ class Generator(object):
 
         if not pull_requests:
             return []
-        pulls = copy.deepcopy(pull_requests)
-        for pr in pulls:
-            fetched_pr = None
-            for fpr in closed_pull_requests:
-                if fpr['number'] == pr['number']:
-                    fetched_pr = fpr
-            if fetched_pr:
-                pr['merged_at'] = fetched_pr['merged_at']
-                closed_pull_requests.remove(fetched_pr)
-
-        for pr in pulls:
-            if not pr.get('merged_at'):
-                pulls.remove(pr)
+        fetched_prs = dict(
+            (fpr['number'], fpr) for fpr in closed_pull_requests
+        )
+        pulls = []
+        for pr in pull_requests:
+            fetched_pr = fetched_prs.get(pr['number'])
+            # not merged or not merged into the release branch
+            if not fetched_pr or not fetched_pr.get('merged_at'):
+                continue
+            pr['merged_at'] = fetched_pr['merged_at']
+            pr['merge_commit_sha'] = fetched_pr.get('merge_commit_sha')
+            pulls.append(pr)
         return pulls
 
     def fetch_and_filter_tags(self):
@@ -849,9 +1169,15 @@ class Generator(object):
         Fetch and filter tags, fetch dates and sort them in time order.
         """
 
-        self.all_tags = self.fetcher.get_all_tags()
-        self.filtered_tags = self.get_filtered_tags(self.all_tags)
-        self.fetch_tags_dates()
+        with self.stats.phase("tags"):
+            self.all_tags = [
+                Tag.from_api(tag) for tag in self.fetcher.get_all_tags()
+            ]
+            # excluded tags don't need a date
+            self.named_tags = self.filter_excluded_tags(self.all_tags)
+        with self.stats.phase("tag dates"):
+            self.fetch_tags_dates(self.named_tags + self.option_tags())
+            self.filtered_tags = self.get_filtered_tags(self.named_tags)
 
     def sort_tags_by_date(self, tags):
         """
@@ -963,10 +1289,11 @@ class Generator(object):
 
     def get_filtered_tags(self, all_tags):
         """
-        Return tags after filtering tags in lists provided by
-        option: --between-tags & --exclude-tags
+        Return tags after filtering tags by date according to the options
+        --since-tag, --between-tags & --due-tag. The dates of the tags
+        have to be fetched already.
 
-        :param list(dict) all_tags: All tags.
+        :param list(dict) all_tags: Tags, not excluded by name.
         :rtype: list(dict)
         :return: Filtered tags.
         """
@@ -976,7 +1303,32 @@ class Generator(object):
             filtered_tags = self.filter_between_tags(filtered_tags)
         if self.options.due_tag:
             filtered_tags = self.filter_due_tag(filtered_tags)
-        return self.filter_excluded_tags(filtered_tags)
+        return filtered_tags
+
+    def option_tags(self):
+        """
+        Get the tags given by name with --since-tag, --due-tag and
+        --between-tags. Their dates are needed, even if they are
+        excluded.
+
+        :rtype: list(dict)
+        """
+
+        names = [self.detect_since_tag(), self.options.due_tag]
+        names.extend(self.options.between_tags or [])
+        return [tag for tag in self.all_tags if tag["name"] in names]
+
+    def find_tag(self, name):
+        """
+        :param str name: Name of the tag.
+        :rtype: dict
+        :return: the tag from all tags or None, if there is none
+        """
+
+        for tag in self.all_tags:
+            if tag["name"] == name:
+                return tag
+        return None
 
     def filter_since_tag(self, all_tags):
         """
@@ -989,17 +1341,14 @@ class Generator(object):
 
         tag = self.detect_since_tag()
         if not tag or tag == REPO_CREATED_TAG_NAME:
-            return copy.deepcopy(all_tags)
+            return list(all_tags)
 
         filtered_tags = []
-        tag_names = [t["name"] for t in all_tags]
-        try:
-            idx = tag_names.index(tag)
-        except ValueError:
+        since_tag = self.find_tag(tag)
+        if not since_tag:
             self.warn_if_tag_not_found(tag, "since-tag")
-            return copy.deepcopy(all_tags)
+            return list(all_tags)
 
-        since_tag = all_tags[idx]
         since_date = self.get_time_of_tag(since_tag)
         for t in all_tags:
             tag_date = self.get_time_of_tag(t)
@@ -1018,14 +1367,11 @@ class Generator(object):
 
         filtered_tags = []
         tag = self.options.due_tag
-        tag_names = [t["name"] for t in all_tags]
-        try:
-            idx = tag_names.index(tag)
-        except ValueError:
+        due_tag = self.find_tag(tag)
+        if not due_tag:
             self.warn_if_tag_not_found(tag, "due-tag")
-            return copy.deepcopy(all_tags)
+            return list(all_tags)
 
-        due_tag = all_tags[idx]
         due_date = self.get_time_of_tag(due_tag)
         for t in all_tags:
             tag_date = self.get_time_of_tag(t)
@@ -1042,16 +1388,14 @@ class Generator(object):
         :return: Filtered tags.
         """
 
-        tag_names = [t["name"] for t in all_tags]
         between_tags = []
         for tag in self.options.between_tags:
-            try:
-                idx = tag_names.index(tag)
-            except ValueError:
+            between_tag = self.find_tag(tag)
+            if not between_tag:
                 raise ChangelogGeneratorError(
                     "ERROR: can't find tag {0}, specified with "
                     "--between-tags option.".format(tag))
-            between_tags.append(all_tags[idx])
+            between_tags.append(between_tag)
 
         between_tags = self.sort_tags_by_date(between_tags)
 
@@ -1068,7 +1412,9 @@ class Generator(object):
                 between_tags.append(tag)
         if older == newer:
             between_tags.pop(0)
-        return between_tags
+        # the given tags may be excluded
+        names = set(tag["name"] for tag in all_tags)
+        return [tag for tag in between_tags if tag["name"] in names]
 
     def filter_excluded_tags(self, all_tags):
         """
@@ -1078,7 +1424,7 @@ class Generator(object):
         :rtype: list(dict)
         :return: Filtered tags.
         """
-        filtered_tags = copy.deepcopy(all_tags)
+        filtered_tags = list(all_tags)
         if self.options.exclude_tags:
             filtered_tags = self.apply_exclude_tags(filtered_tags)
         if self.options.exclude_tags_regex:
@@ -1109,13 +1455,12 @@ class Generator(object):
         :rtype: list(dict)
         :return: Filtered tags.
         """
-        filtered = copy.deepcopy(all_tags)
-        for tag in all_tags:
-            if tag["name"] not in self.options.exclude_tags:
-                self.warn_if_tag_not_found(tag, "exclude-tags")
-            else:
-                filtered.remove(tag)
-        return filtered
+        names = set(tag["name"] for tag in all_tags)
+        for name in self.options.exclude_tags:
+            if name not in names:
+                self.warn_if_tag_not_found(name, "exclude-tags")
+        return [tag for tag in all_tags
+                if tag["name"] not in self.options.exclude_tags]
 
     def warn_if_nonmatching_regex(self):
         if not self.options.quiet:
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import random
+import sys
+import threading
+import time
+if sys.version_info.major == 3:
+    from builtins import object
+
+
+# Below this fraction of the rate limit left, fewer requests are
+# sent simultaneously, down to one at a time.
+LOW_BUDGET = 0.1
+# Status codes of transient server errors, worth to try again.
+RETRY_STATUS = (500, 502, 503, 504)
+
+
+def header_dict(headers):
+    """ Response headers as dictionary with lowercase names. """
+    return dict((k.lower(), v) for k, v in headers or [])
+
+
+class RateLimitGovernor(object):
+    """
+    Keeps the requests of all workers within the rate limit of GitHub.
+
+    The rate limit headers (X-RateLimit-Remaining, X-RateLimit-Reset and
+    Retry-After) of every response are tracked. When the remaining
+    requests get low, less requests are allowed at the same time. When
+    the rate limit is exhausted, all requests wait until it is reset.
+    Server errors (5xx) and secondary rate limits (403) are retried
+    with a jittered exponential backoff.
+    """
+
+    def __init__(self, max_concurrency, retries=5, backoff=1.0,
+                 max_backoff=64.0, verbose=0):
+        """
+        :param int max_concurrency: Max number of simultaneous requests.
+        :param int retries: How often to retry a failed request.
+        :param float backoff: Seconds to wait before the first retry.
+        :param float max_backoff: Max seconds to wait before a retry.
+        :param int verbose: Verbosity level.
+        """
+
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.verbose = verbose
+        self.cond = threading.Condition()
+        self.active = 0
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.paused_until = 0
+        self.waited = 0.0
+        self.retried = 0
+
+    def concurrency(self):
+        """
+        :rtype: int
+        :return: Number of requests allowed at the same time for the
+                 remaining rate limit.
+        """
+
+        if not self.limit or self.remaining is None:
+            return self.max_concurrency
+        budget = self.remaining / self.limit
+        if budget >= LOW_BUDGET:
+            return self.max_concurrency
+        return max(1, int(self.max_concurrency * budget / LOW_BUDGET))
+
+    def call(self, send):
+        """
+        Send a request within the rate limit. Retry it, if the rate limit
+        was exceeded or GitHub had a transient error.
+
+        :param send: Function sending the request,
+                     returning status code, data and headers.
+        :rtype: int, list|dict, list
+        :return: status code, data and headers of the (last) response
+        """
+
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                rc, data, headers = send()
+            finally:
+                self.release()
+            delay = self.update(rc, data, headers, attempt)
+            if delay is None:
+                return rc, data, headers
+            self.sleep(delay)
+            attempt += 1
+
+    def acquire(self):
+        """ Wait for a free slot and until a pause is over. """
+
+        with self.cond:
+            while True:
+                delay = self.paused_until - time.time()
+                if delay <= 0 and self.active < self.concurrency():
+                    break
+                self.cond.wait(delay if delay > 0 else None)
+            self.active += 1
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def sleep(self, delay):
+        """ Wait before a retry. """
+        time.sleep(delay)
+        self.add_wait(delay)
+
+    def add_wait(self, delay):
+        with self.cond:
+            self.waited += delay
+
+    def update(self, rc, data, headers, attempt):
+        """
+        Track the rate limit of a response and decide about a retry.
+
+        :param int rc: Status code of the response.
+        :param data: Data of the response.
+        :param list headers: Headers of the response.
+        :param int attempt: Number of retries so far.
+        :rtype: float
+        :return: Seconds to wait before the next try
+                 or None, if the response should be used.
+        """
+
+        hdr = header_dict(headers)
+        with self.cond:
+            if "x-ratelimit-remaining" in hdr:
+                self.remaining = int(hdr["x-ratelimit-remaining"])
+                self.limit = int(hdr.get("x-ratelimit-limit", 0)) or None
+                self.reset = int(hdr.get("x-ratelimit-reset", 0)) or None
+                if self.remaining == 0 and self.reset:
+                    # nothing left, nobody may send a request before reset
+                    self.pause(max(self.reset + 1, time.time() + 1))
+            self.cond.notify_all()
+
+        if rc in (403, 429) and hdr.get("x-ratelimit-remaining") == "0" \
+                and self.reset:
+            # primary rate limit, acquire() waits until reset
+            return 0
+        if attempt >= self.retries:
+            return None
+        secondary = "retry-after" in hdr or self.secondary(data)
+        if rc in RETRY_STATUS or rc == 429 or (rc == 403 and secondary):
+            with self.cond:
+                self.retried += 1
+            if "retry-after" in hdr:
+                with self.cond:
+                    self.pause(time.time() + int(hdr["retry-after"]))
+                return 0
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            return random.uniform(delay / 2, delay)
+        return None
+
+    @staticmethod
+    def secondary(data):
+        """ Check, if a 403 was caused by a secondary rate limit. """
+        message = data.get("message", "") if isinstance(data, dict) else ""
+        return "rate limit" in message.lower()
+
+    def pause(self, until):
+        """
+        Let all requests wait until the given time. Must be called with
+        the lock held.
+
+        :param float until: Time (seconds since the epoch) to wait until.
+        """
+
+        now = time.time()
+        if until <= max(now, self.paused_until):
+            return
+        self.waited += until - max(now, self.paused_until)
+        self.paused_until = until
+        if self.verbose:
+            print("\nGitHub API rate limit reached, waiting until {}".format(
+                time.strftime("%H:%M:%S", time.localtime(until))
+            ))
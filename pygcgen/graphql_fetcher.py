@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+from .archive import request_key
+from .fetcher import (
+    Fetcher, PER_PAGE_NUMBER, REPO_CREATED_TAG_NAME, is_needed
+)
+from .pygcgen_exceptions import GithubApiError
+from .transport import Response
+
+
+GRAPHQL_TOKEN_REQUIRED_MSG = \
+    "The GraphQL API of GitHub can only be used with a token."
+
+COMMIT_FIELDS = "oid authoredDate committedDate"
+
+TAGS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    createdAt
+    refs(refPrefix: "refs/tags/", first: $first, after: $after,
+         orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        target {
+          ... on Commit { %(commit)s }
+          ... on Tag { target { ... on Commit { %(commit)s } } }
+        }
+      }
+    }
+  }
+}
+""" % {"commit": COMMIT_FIELDS}
+
+ITEM_FIELDS = """
+        number title url createdAt updatedAt closedAt
+        author { login url }
+        milestone { title }
+        labels(first: 100) { nodes { name } }
+"""
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    issues(states: CLOSED, first: $first, after: $after,
+           orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        %(item)s
+        timelineItems(itemTypes: [CLOSED_EVENT], last: 1) {
+          nodes {
+            ... on ClosedEvent {
+              createdAt
+              closer {
+                ... on Commit { %(commit)s }
+                ... on PullRequest { mergeCommit { %(commit)s } }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""" % {"item": ITEM_FIELDS, "commit": COMMIT_FIELDS}
+
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: [CLOSED, MERGED], first: $first, after: $after,
+                 orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        %(item)s
+        mergedAt
+        baseRefName
+        mergeCommit { %(commit)s }
+        timelineItems(itemTypes: [MERGED_EVENT], last: 1) {
+          nodes {
+            ... on MergedEvent { createdAt commit { %(commit)s } }
+          }
+        }
+      }
+    }
+  }
+}
+""" % {"item": ITEM_FIELDS, "commit": COMMIT_FIELDS}
+
+
+class GraphQLFetcher(Fetcher):
+    """
+    A Fetcher using the GraphQL API (v4) of GitHub.
+
+    Issues and pull requests are fetched together with their closing
+    (merge) event and the dates of the closing commit, tags together with
+    the dates of their commits. Everything is fetched in pages of 100,
+    instead of one request per issue, event, commit and tag.
+    The data is returned in the same shape as from the REST API.
+    """
+
+    def __init__(self, options, session):
+        super(GraphQLFetcher, self).__init__(options, session)
+        if not self.options.token:
+            raise GithubApiError(GRAPHQL_TOKEN_REQUIRED_MSG)
+        # incremental syncing is only available with the REST API
+        self.snapshot = None
+        self.repo_created_at = None
+        self.pull_requests = []
+
+    def query(self, query, **variables):
+        """
+        Run a GraphQL query.
+
+        :param str query: GraphQL query.
+        :param variables: Variables for the query.
+        :rtype: dict
+        :return: "data" of the response
+        """
+
+        gh = self.github
+
+        def send():
+            rc, data = gh.graphql.post(
+                body={"query": query, "variables": variables}
+            )
+            self.stats.request("/graphql", gh.client.last_response_size())
+            return Response(rc, data, gh.getheaders())
+
+        key = request_key("POST", "/graphql",
+                          body={"query": query, "variables": variables})
+        rc, data, headers = self.call(key, send)
+        if rc != 200:
+            self.raise_GitHubError(rc, data, headers)
+        if data.get("errors"):
+            raise GithubApiError("GraphQL: {0}".format(
+                "; ".join(e["message"] for e in data["errors"])
+            ))
+        return data["data"]
+
+    def query_pages(self, query, connection, limit=sys.maxsize):
+        """
+        Fetch all pages of a connection in the repository.
+
+        :param str query: GraphQL query with a $after variable.
+        :param str connection: Name of the connection in the repository.
+        :param int limit: Stop after this many nodes.
+        :rtype: list(dict), dict
+        :return: nodes of all pages and the repository of the last page
+        """
+
+        verbose = self.options.verbose
+        nodes = []
+        after = None
+        while True:
+            if verbose > 2:
+                print(".", end="")
+            repository = self.query(
+                query, owner=self.options.user, name=self.options.project,
+                first=PER_PAGE_NUMBER, after=after
+            )["repository"]
+            nodes.extend(repository[connection]["nodes"])
+            page_info = repository[connection]["pageInfo"]
+            if not page_info["hasNextPage"] or len(nodes) >= limit:
+                break
+            after = page_info["endCursor"]
+        if verbose > 2:
+            print(".")
+        return nodes, repository
+
+    def add_commit(self, commit):
+        """
+        Remember the dates of a commit, to avoid fetching it later.
+
+        :param dict commit: GraphQL commit with oid and dates.
+        :rtype: str
+        :return: SHA of the commit or None
+        """
+
+        if not commit or not commit.get("oid"):
+            return None
+        self.commits.put({
+            "sha": commit["oid"],
+            "author": {"date": commit["authoredDate"]},
+            "committer": {"date": commit["committedDate"]},
+        })
+        return commit["oid"]
+
+    def iter_tags(self):
+        """
+        Iterate over all tags of the repository. The dates of the tagged
+        commits are fetched with them.
+
+        :rtype: generator
+        """
+
+        nodes, repository = self.query_pages(TAGS_QUERY, "refs")
+        self.repo_created_at = repository["createdAt"]
+        for node in nodes:
+            target = node["target"] or {}
+            if "target" in target:
+                # annotated tag
+                target = target["target"] or {}
+            sha = self.add_commit(target)
+            if sha:
+                yield {"name": node["name"], "commit": {"sha": sha}}
+
+    def get_all_tags(self):
+        """
+        Fetch all tags for repository from Github, including the dates.
+
+        :return: tags in repository
+        :rtype: list
+        """
+
+        if self.options.verbose:
+            print("Fetching tags...")
+        tags = list(self.iter_tags())
+
+        if len(tags) == 0:
+            if not self.options.quiet:
+                print("Warning: Can't find any tags in repo. Make sure, that "
+                      "you push tags to remote repo via 'git push --tags'")
+                exit()
+        if self.options.verbose > 1:
+            print("Found {} tag(s)".format(len(tags)))
+        return tags
+
+    @staticmethod
+    def item_from_node(node):
+        """
+        Convert an issue or pull request from GraphQL to the REST shape.
+
+        :param dict node: GraphQL issue or pull request.
+        :rtype: dict
+        :return: issue as returned by the REST API
+        """
+
+        author = node["author"]
+        return {
+            "number": node["number"],
+            "title": node["title"],
+            "html_url": node["url"],
+            "state": "closed",
+            "created_at": node["createdAt"],
+            "updated_at": node["updatedAt"],
+            "closed_at": node["closedAt"],
+            "user": {
+                "login": author["login"], "html_url": author["url"]
+            } if author else None,
+            "milestone": node["milestone"],
+            "labels": node["labels"]["nodes"],
+        }
+
+    def iter_closed_issues(self, closed_after=None, milestones=()):
+        """
+        Iterate over all closed issues and pull requests with their
+        closing events and dates of the closing commits, newest first.
+
+        Issues and pull requests are separate connections in GraphQL, so
+        both are fetched completely before the first item is yielded.
+
+        :param str closed_after: see Fetcher.iter_closed_issues()
+        :param milestones: see Fetcher.iter_closed_issues()
+        :rtype: generator
+        """
+
+        verbose = self.options.verbose
+        if verbose:
+            print("Fetching closed issues and pull requests...")
+
+        items = []
+        max_issues = self.options.max_issues
+        nodes, _ = self.query_pages(ISSUES_QUERY, "issues", max_issues)
+        for node in nodes:
+            issue = self.item_from_node(node)
+            issue["events"] = []
+            for event in node["timelineItems"]["nodes"]:
+                closer = event.get("closer") or {}
+                if "mergeCommit" in closer:
+                    closer = closer["mergeCommit"]
+                issue["events"].append({
+                    "event": "closed",
+                    "commit_id": self.add_commit(closer),
+                    "created_at": event["createdAt"],
+                })
+            items.append(issue)
+
+        nodes, _ = self.query_pages(PULL_REQUESTS_QUERY, "pullRequests",
+                                    max_issues)
+        for node in nodes:
+            pr = self.item_from_node(node)
+            pr["pull_request"] = {"html_url": node["url"]}
+            pr["events"] = []
+            for event in node["timelineItems"]["nodes"]:
+                pr["events"].append({
+                    "event": "merged",
+                    "commit_id": self.add_commit(event.get("commit")),
+                    "created_at": event["createdAt"],
+                })
+            pr["events"].append({
+                "event": "closed",
+                "commit_id": None,
+                "created_at": node["closedAt"],
+            })
+            items.append(pr)
+            self.pull_requests.append({
+                "number": node["number"],
+                "merged_at": node["mergedAt"],
+                "merge_commit_sha": self.add_commit(node["mergeCommit"]),
+                "base": {"ref": node["baseRefName"]},
+            })
+
+        # Same order as from the REST API: newest first.
+        items.sort(key=lambda i: (i["created_at"], i["number"]), reverse=True)
+        items = items[:max_issues]
+        self.first_issue = items[-1] if items else []
+        for item in items:
+            if not closed_after or is_needed(item, closed_after, milestones):
+                yield item
+
+    def iter_closed_pull_requests(self):
+        """
+        Iterate over the closed pull requests, already fetched together
+        with the issues. We need them to detect "merged_at" parameter.
+
+        :rtype: generator
+        """
+
+        release_branch = self.options.release_branch
+        for pr in self.pull_requests:
+            if not release_branch or pr["base"]["ref"] == release_branch:
+                yield pr
+
+    def fetch_repo_creation_date(self):
+        """
+        Get the creation date of the repository from GitHub.
+
+        :rtype: str, str
+        :return: special tag name, creation date as ISO date string
+        """
+
+        if self.repo_created_at:
+            return REPO_CREATED_TAG_NAME, self.repo_created_at
+        return super(GraphQLFetcher, self).fetch_repo_creation_date()
+
+    def fetch_events_async(self, issues, tag_name, since=None, needed=None):
+        """
+        Events are fetched together with the issues. Only fetch the
+        events of issues, that don't have them already.
+
+        :param list issues: all issues
+        :param str tag_name: name of the tag to fetch events for
+        :param str since: see Fetcher.fetch_events_async
+        :param needed: see Fetcher.fetch_events_async
+        :returns: Nothing
+        """
+
+        missing = [i for i in issues if "events" not in i]
+        if missing:
+            super(GraphQLFetcher, self).fetch_events_async(
+                missing, tag_name, since, needed
+            )
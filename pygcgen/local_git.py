@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import re
+import subprocess
+import sys
+import threading
+import time
+if sys.version_info.major == 3:
+    from builtins import object
+
+
+# user and project from a remote url, e.g.
+#   git@github.com:skywinder/Github-Changelog-Generator.git
+#   https://github.com/skywinder/ChangelogMerger
+REMOTE_REGEX = r"[:/](?P<user>[^/:]+)/(?P<project>[^/]+?)(?:\.git)?/?$"
+
+
+def git(*args):
+    """
+    Run a git command in the current directory.
+
+    :rtype: str
+    :return: output of the command or None, if it failed
+    """
+
+    try:
+        output = subprocess.Popen(
+            ("git",) + args,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        ).communicate()[0]
+    except OSError:
+        # git binary not found
+        return None
+    return output.decode("utf-8", "replace")
+
+
+def iso_date(timestamp):
+    """ Unix timestamp as ISO date string (UTC), like GitHub returns it. """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(timestamp)))
+
+
+class LocalGit(object):
+    """
+    Dates of commits from the local clone of the repository.
+
+    All commits reachable from any ref are read with a single `git log`
+    on first use and kept in memory. Commits which aren't in the clone
+    (e.g. from forks or beyond a shallow clone) aren't found here and
+    have to be fetched from GitHub.
+    """
+
+    def __init__(self):
+        self.commits = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def matches(user, project, remote="origin"):
+        """
+        Check, if the current directory is a clone of the repository.
+
+        :param str user: GitHub user of the repository.
+        :param str project: GitHub project name.
+        :param str remote: Name of the git remote pointing to GitHub.
+        :rtype: bool
+        """
+
+        url = git("config", "--get", "remote.{0}.url".format(remote))
+        match = re.search(REMOTE_REGEX, (url or "").strip())
+        if not match:
+            return False
+        return match.group("user").lower() == user.lower() and \
+            match.group("project").lower() == project.lower()
+
+    def load(self):
+        """ Read the dates of all commits in the clone. """
+
+        commits = {}
+        output = git("log", "--all", "--format=%H %at %ct") or ""
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) != 3:
+                continue
+            sha, author_time, commit_time = parts
+            commits[sha] = {
+                "sha": sha,
+                "author": {"date": iso_date(author_time)},
+                "committer": {"date": iso_date(commit_time)},
+            }
+        self.commits = commits
+
+    def get(self, sha):
+        """
+        :param str sha: SHA of the commit
+        :rtype: dict
+        :return: dictionary with commit data (sha, author and committer)
+                 or None, if the commit isn't in the clone
+        """
+
+        with self.lock:
+            if self.commits is None:
+                self.load()
+        return self.commits.get(sha)
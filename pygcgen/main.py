@@ -2,7 +2,9 @@
 
 from __future__ import print_function
 
+import argparse
 import codecs
+import json
 import os
 import re
 import sys
@@ -37,20 +39,28 @@ def checkname(filename):
 class ChangelogGenerator(object):
     """ Class responsible for whole change log generation cycle. """
 
-    def __init__(self, options=None):
+    def __init__(self, options=None, session=None):
         """
         :type options: list
-        :param options: command line arguments
+        :param options: command line arguments or options already
+                        parsed by OptionsParser
+        :param Session session: session to share with other generators
         """
 
-        self.options = OptionsParser(options).options
-        self.generator = Generator(self.options)
+        if not isinstance(options, argparse.Namespace):
+            options = OptionsParser(options).options
+        self.options = options
+        self.generator = Generator(self.options, session)
 
     def run(self):
         """
         The entry point of this script to generate change log
         'ChangelogGeneratorError' Is thrown when one
         of the specified tags was not found in list of tags.
+
+        :rtype: dict
+        :return: Report of the time, requests and bytes of each phase
+                 (see --stats) or None, if nothing was generated.
         """
         if not self.options.project or not self.options.user:
             print("Project and/or user missing. "
@@ -60,18 +70,45 @@ class ChangelogGenerator(object):
         if not self.options.quiet:
             print("Generating changelog...")
 
-        log = None
         try:
-            log = self.generator.compound_changelog()
+            out, report = self.generate()
         except ChangelogGeneratorError as err:
             print("\n\033[91m\033[1m{}\x1b[0m".format(err.args[0]))
             exit(1)
-        if not log:
+        if not out:
             if not self.options.quiet:
                 print("Empty changelog generated. {} not written.".format(
                     self.options.output)
                 )
-            return
+            return report
+
+        if not self.options.quiet:
+            print("Done!")
+            print("Generated changelog written to {}".format(out))
+            governor = self.generator.fetcher.governor
+            if governor.waited:
+                print("Waited {:.0f}s for the GitHub API rate limit "
+                      "({} retries).".format(governor.waited,
+                                             governor.retried))
+        return report
+
+    def generate(self):
+        """
+        Generate the change log and write it to the output file, the
+        report to the --stats file.
+
+        :rtype: str, dict
+        :return: Name of the written file (None, if the change log was
+                 empty) and the report of each phase.
+        """
+
+        log = self.generator.compound_changelog()
+        report = self.generator.stats.report()
+        if self.options.stats:
+            with codecs.open(self.options.stats, "w", "utf-8") as fh:
+                json.dump(report, fh, indent=2)
+        if not log:
+            return None, report
 
         if self.options.no_overwrite:
             out = checkname(self.options.output)
@@ -80,14 +117,27 @@ class ChangelogGenerator(object):
 
         with codecs.open(out, "w", "utf-8") as fh:
             fh.write(log)
-
-        if not self.options.quiet:
-            print("Done!")
-            print("Generated changelog written to {}".format(out))
+        return out, report
 
 
 def run():
-    ChangelogGenerator(sys.argv[1:]).run()
+    options = OptionsParser(sys.argv[1:]).options
+    if options.serve:
+        from .service import serve
+        serve(options)
+        return
+    if not options.batch:
+        ChangelogGenerator(options).run()
+        return
+
+    from .batch import BatchGenerator
+    try:
+        reports = BatchGenerator(sys.argv[1:]).run()
+    except ChangelogGeneratorError as err:
+        print("\n\033[91m\033[1m{}\x1b[0m".format(err.args[0]))
+        exit(1)
+    if None in reports.values():
+        exit(1)
 
 
 # def run_gui():
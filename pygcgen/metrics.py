@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+if sys.version_info.major == 3:
+    from builtins import object
+
+
+class Counters(object):
+    """ Counters (e.g. number of requests), safe to use from all threads. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = Counter()
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.values[name] += value
+
+    def get(self, name):
+        with self.lock:
+            return self.values[name]
+
+    def reset(self, name):
+        with self.lock:
+            self.values[name] = 0
+
+    def as_dict(self):
+        with self.lock:
+            return dict(self.values)
+
+
+# Python 2 has no process_time
+_cpu_time = time.process_time if hasattr(time, "process_time") \
+    else time.clock
+
+
+def endpoint_name(path):
+    """
+    Name of the endpoint of a request, e.g.
+    /repos/:owner/:repo/issues/:number/events
+
+    :param str path: Path of the request.
+    :rtype: str
+    """
+
+    path = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/:owner/:repo", path)
+    path = re.sub(r"/[0-9a-f]{40}(?=/|$)", "/:sha", path)
+    return re.sub(r"/\d+(?=/|$)", "/:number", path)
+
+
+class Stats(object):
+    """
+    Instrumentation of a changelog generation: wall and CPU time of each
+    phase, together with the requests, bytes, retries, cache hits and
+    misses counted during the phase.
+    """
+
+    def __init__(self):
+        self.counters = Counters()
+        # name -> function returning a total (e.g. retries of the governor)
+        self.sources = OrderedDict()
+        # name -> function returning the current value
+        self.gauges = OrderedDict()
+        self.phases = OrderedDict()
+        self.start = time.time()
+        self.cpu_start = _cpu_time()
+
+    def request(self, path, size):
+        """
+        Count a request.
+
+        :param str path: Path of the request.
+        :param int size: Bytes received.
+        """
+
+        self.counters.add("requests")
+        self.counters.add("endpoint " + endpoint_name(path))
+        self.counters.add("bytes", size)
+
+    def totals(self):
+        values = self.counters.as_dict()
+        for name, func in self.sources.items():
+            values[name] = func()
+        return values
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure a phase. The times and counts of a phase, that is
+        entered again, are added up.
+
+        :param str name: Name of the phase.
+        """
+
+        before = self.totals()
+        wall, cpu = time.time(), _cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.time() - wall, _cpu_time() - cpu
+            after = self.totals()
+            phase = self.phases.setdefault(name, Counter())
+            phase["wall"] += wall
+            phase["cpu"] += cpu
+            for key, value in after.items():
+                phase[key] += value - before.get(key, 0)
+            for key, func in self.gauges.items():
+                # value at the end of the phase
+                phase[key] = func()
+
+    def summary(self, values):
+        summary = OrderedDict([
+            ("wall", values.get("wall", 0.0)),
+            ("cpu", values.get("cpu", 0.0)),
+            ("requests", values.get("requests", 0)),
+            ("requests_by_endpoint", OrderedDict(sorted(
+                (key.split(" ", 1)[1], count)
+                for key, count in values.items()
+                if key.startswith("endpoint ") and count
+            ))),
+        ])
+        for key in sorted(values):
+            if key not in summary and not key.startswith("endpoint "):
+                summary[key] = values[key]
+        return summary
+
+    def report(self):
+        """
+        :rtype: dict
+        :return: totals and phases, ready to be written as JSON
+        """
+
+        totals = self.totals()
+        totals["wall"] = time.time() - self.start
+        totals["cpu"] = _cpu_time() - self.cpu_start
+        report = self.summary(totals)
+        for name, func in self.gauges.items():
+            report[name] = func()
+        report["phases"] = OrderedDict(
+            (name, self.summary(values))
+            for name, values in self.phases.items()
+        )
+        return report
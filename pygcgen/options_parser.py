@@ -16,7 +16,14 @@ from .version import __version__
 
 
 DEFAULT_OPTIONS = {
+    "backend": "rest",
+    "batch_jobs": 8,
+    "cache_max_size": 100,
+    "engine": "threads",
+    "events": "issue",
     "date_format": "%Y-%m-%d",
+    "date_margin": 24,
+    "date_resolution": "exact",
     "exclude_labels": [],
     "git_remote": "origin",
     "github_api": "api.github.com",
@@ -28,6 +35,7 @@ DEFAULT_OPTIONS = {
     "merge_prefix": "**Merged pull requests:**",
     "options_file": ".pygcgen",
     "output": "CHANGELOG.md",
+    "pr_date_source": "events",
     "unreleased_label": "Unreleased",
 }
 
@@ -284,11 +292,142 @@ class OptionsParser(object):
             "Default is %d." % DEFAULT_OPTIONS["max_simultaneous_requests"]
         )
 
+        parser.add_argument(
+            "--backend", choices=["rest", "graphql"],
+            default=DEFAULT_OPTIONS["backend"],
+            help="API of GitHub to use. 'graphql' fetches issues, events "
+                 "and commit dates in batches and needs a token. "
+                 "Default is: {0}".format(DEFAULT_OPTIONS["backend"])
+        )
+        parser.add_argument(
+            "--engine", choices=["threads", "asyncio"],
+            default=DEFAULT_OPTIONS["engine"],
+            help="How to fetch events, commits and tag dates simultaneous. "
+                 "'asyncio' (Python 3 only) uses keep-alive connections. "
+                 "Default is: {0}".format(DEFAULT_OPTIONS["engine"])
+        )
+        parser.add_argument(
+            "--events", choices=["issue", "repository"],
+            default=DEFAULT_OPTIONS["events"],
+            help="Where to get the closing events from. 'issue' fetches "
+                 "the events of each issue, 'repository' pages through the "
+                 "events feed of the repository once and only fetches the "
+                 "events of issues it doesn't cover. "
+                 "Default is: {0}".format(DEFAULT_OPTIONS["events"])
+        )
+        parser.add_argument(
+            "--pr-date-source", choices=["events", "pulls"],
+            default=DEFAULT_OPTIONS["pr_date_source"],
+            help="Where to get the date of merged pull requests from. "
+                 "'events' uses the merged event of each pull request, "
+                 "'pulls' the merge commit from the pulls listing, without "
+                 "fetching the events of pull requests. "
+                 "Default is: {0}".format(DEFAULT_OPTIONS["pr_date_source"])
+        )
+        parser.add_argument(
+            "--date-resolution", choices=["exact", "lazy"],
+            default=DEFAULT_OPTIONS["date_resolution"],
+            help="How to find the dates of issues and pull requests. "
+                 "'exact' fetches the events and closing commits of all. "
+                 "'lazy' only of those closed within --date-margin after a "
+                 "tag, the others are dated by their closing. "
+                 "Default is: {0}".format(DEFAULT_OPTIONS["date_resolution"])
+        )
+        parser.add_argument(
+            "--date-margin", metavar="HOURS",
+            type=int, default=DEFAULT_OPTIONS["date_margin"],
+            help="With --date-resolution lazy, the exact dates of issues "
+                 "closed up to HOURS after a tag are fetched. "
+                 "Default is %d." % DEFAULT_OPTIONS["date_margin"]
+        )
+        parser.add_argument(
+            "--cache-dir", metavar="DIR",
+            help="Cache responses from GitHub in DIR. Cached responses are "
+                 "revalidated, so unchanged data doesn't count against the "
+                 "rate limit."
+        )
+        parser.add_argument(
+            "--cache-max-size", metavar="MB",
+            type=int, default=DEFAULT_OPTIONS["cache_max_size"],
+            help="Max size of the response cache in MB. Least recently used "
+                 "responses are removed first. "
+                 "Default is %d." % DEFAULT_OPTIONS["cache_max_size"]
+        )
+        parser.add_argument(
+            "--sync-file", metavar="FILE",
+            help="Keep a snapshot of closed issues and pull requests in FILE. "
+                 "On the next run only issues updated since then are fetched. "
+                 "Not available with --backend graphql."
+        )
+        parser.add_argument(
+            "--commit-store", metavar="FILE",
+            help="Keep the dates of fetched commits in FILE, so they are "
+                 "not fetched again on the next run. Default with "
+                 "--sync-file is FILE.commits next to the snapshot."
+        )
+        parser.add_argument(
+            "--record", metavar="DIR",
+            help="Record all requests to GitHub and their responses in an "
+                 "archive in DIR, to replay the run later with --replay. "
+                 "The response cache isn't used while recording."
+        )
+        parser.add_argument(
+            "--replay", metavar="DIR",
+            help="Replay a run recorded with --record from the archive in "
+                 "DIR, without any requests to GitHub. Use the same options "
+                 "as for recording."
+        )
+        parser.add_argument(
+            "--stats", metavar="FILE",
+            help="Write a report of the time, requests, received bytes, "
+                 "retries and cache hits of each phase as JSON to FILE."
+        )
+        parser.add_argument(
+            "--batch", metavar="MANIFEST",
+            help="Generate the change logs of all repositories listed in "
+                 "MANIFEST, one line of options (at least -u and -p) per "
+                 "repository. The other options apply to all of them. "
+                 "{user} and {project} in file names are replaced."
+        )
+        parser.add_argument(
+            "--batch-jobs", metavar="NUMBER",
+            type=int, default=DEFAULT_OPTIONS["batch_jobs"],
+            help="Number of repositories generated at the same time with "
+                 "--batch. They share the requests of "
+                 "--max-simultaneous-requests, the cache and the rate limit. "
+                 "Default is %d." % DEFAULT_OPTIONS["batch_jobs"]
+        )
+        parser.add_argument(
+            "--serve", metavar="[ADDRESS:]PORT",
+            help="Keep running after generating the change log: serve it "
+                 "over HTTP and update it from webhook events of GitHub "
+                 "(issues, pull_request, create and delete), which are "
+                 "POSTed to the same address. Default address is 127.0.0.1."
+        )
+        parser.add_argument(
+            "--webhook-secret", metavar="SECRET",
+            help="Secret of the webhook. With --serve, events without a "
+                 "valid signature are rejected."
+        )
+        parser.add_argument(
+            "--no-local-git", action="store_false", dest="local_git",
+            help="Don't read the dates of tags and commits from the local "
+                 "clone. By default they are read from it, if pygcgen runs "
+                 "in a clone of the repository."
+        )
+
         opts = parser.parse_args(options)
+        if opts.record and opts.replay:
+            parser.error("--record and --replay can't be used together")
+        if opts.serve and (opts.record or opts.batch):
+            parser.error("--serve can't be used with --record or --batch")
+        if opts.backend == "graphql" and opts.sync_file:
+            parser.error("--sync-file can't be used with --backend graphql")
 
         if os.path.exists(opts.options_file):
             OptionsFileParser(options=opts).parse()
-        if not opts.user or not opts.project:
+        # the repositories of a batch are given in the manifest
+        if not opts.batch and (not opts.user or not opts.project):
             self.fetch_user_and_project(opts)
 
         sections = OrderedDict()
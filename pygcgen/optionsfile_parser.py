@@ -12,7 +12,13 @@ regex = re.compile(
 )
 
 FILENAME = ".pygcgen"
-KNOWN_INTEGER_KEYS = ["max_issues", "max_simultaneous_requests"]
+KNOWN_INTEGER_KEYS = [
+    "batch_jobs",
+    "cache_max_size",
+    "date_margin",
+    "max_issues",
+    "max_simultaneous_requests",
+]
 KNOWN_ARRAY_KEYS = [
     "between_tags",
     "exclude_labels",
@@ -35,6 +41,7 @@ IRREGULAR_OPTIONS = {
     "no_filter_by_milestone": "filter_issues_by_milestone",
     "no_issues": "issues",
     "no_issues_wo_labels": "add_issues_wo_labels",
+    "no_local_git": "local_git",
     "no_pr_wo_labels": "add_pr_wo_labels",
     "no_pull_requests": "include_pull_request",
     "origin": "git_remote",
@@ -48,6 +55,7 @@ BOOL_KEYS = {
     "no_filter_by_milestone": False,
     "no_issues": False,
     "no_issues_wo_labels": True,
+    "no_local_git": False,
     "no_overwrite": True,
     "no_pr_wo_labels": False,
     "no_pull_requests": False,
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Compact records of the issues, pull requests, tags and events.
+
+The GitHub API returns dozens of fields per issue (body, reactions,
+nested users, ...), of which the generator needs only a few. Each
+payload is projected into a record with __slots__ as soon as it was
+received, so the rest of it can be freed.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+if sys.version_info.major == 3:
+    from builtins import object
+
+
+# the only events needed to find the closing date of an issue
+CLOSING_EVENTS = ("closed", "merged")
+
+# Label names, milestone titles and logins repeat across thousands of
+# issues, keep only one copy of each. (The builtin intern() doesn't
+# take unicode strings in Python 2.)
+_names = {}
+
+
+def intern_name(name):
+    """
+    :param str name: label name, milestone title or login
+    :rtype: str
+    :return: the same string, shared by all records
+    """
+
+    if name is None:
+        return None
+    return _names.setdefault(name, name)
+
+
+class Record(object):
+    """
+    Base of the records: only the fields listed in __slots__, no dict
+    per instance.
+
+    The fields can be read and written like the items of the dict from
+    the API, so code handling those keeps working. A field, that was
+    never set, is missing like a missing key.
+
+    The records aren't immutable: the generator sets "actual_date" and
+    "merged_at" after creating them. After the closed dates are set,
+    they are only read, so the filters share them instead of copying.
+    A copy (or deep copy) is shallow as well, it shares the values of the
+    fields, e.g. the Event records of "events", with the original.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def fields(cls):
+        """
+        :rtype: list(str)
+        :return: names of all fields of the record
+        """
+
+        names = []
+        for klass in reversed(cls.__mro__):
+            names.extend(klass.__dict__.get("__slots__", ()))
+        return names
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def as_dict(self):
+        """
+        :rtype: dict
+        :return: all fields, that are set
+        """
+
+        return dict(
+            (name, getattr(self, name)) for name in self.fields()
+            if hasattr(self, name)
+        )
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __copy__(self):
+        record = self.__class__.__new__(self.__class__)
+        for name, value in self.as_dict().items():
+            setattr(record, name, value)
+        return record
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.as_dict())
+
+
+class Event(Record):
+    """ An event of an issue, e.g. "closed" or "merged". """
+
+    __slots__ = ("event", "commit_id", "created_at")
+
+    def __init__(self, event, commit_id=None, created_at=None):
+        self.event = event
+        self.commit_id = commit_id
+        self.created_at = created_at
+
+    @classmethod
+    def from_api(cls, data):
+        """
+        :param dict data: event from GitHub
+        :rtype: Event
+        """
+
+        if isinstance(data, cls):
+            return data
+        return cls(intern_name(data["event"]), data.get("commit_id"),
+                   data.get("created_at"))
+
+
+def compact_events(events):
+    """
+    Keep only the closing events of an issue.
+
+    :param list(dict) events: events from GitHub, in date order
+    :rtype: tuple(Event)
+    :return: "closed" and "merged" events, in date order
+    """
+
+    return tuple(
+        Event.from_api(event) for event in events
+        if event["event"] in CLOSING_EVENTS
+    )
+
+
+class Issue(Record):
+    """
+    A closed issue. The labels are the label names, the milestone is
+    the title of the milestone.
+    """
+
+    __slots__ = ("number", "title", "html_url", "labels", "milestone",
+                 "user_login", "user_url", "closed_at", "events",
+                 "actual_date")
+
+    @classmethod
+    def from_api(cls, data):
+        """
+        :param dict data: issue from GitHub
+        :rtype: Issue
+        """
+
+        issue = cls()
+        issue.number = data["number"]
+        issue.title = data["title"]
+        issue.html_url = data["html_url"]
+        issue.labels = tuple(
+            intern_name(label["name"]) for label in data.get("labels") or ()
+        )
+        milestone = data.get("milestone")
+        issue.milestone = intern_name(milestone["title"]) \
+            if milestone else None
+        user = data.get("user")
+        issue.user_login = intern_name(user["login"]) if user else None
+        issue.user_url = intern_name(user["html_url"]) if user else None
+        issue.closed_at = data.get("closed_at")
+        if data.get("events") is not None:
+            issue.events = compact_events(data["events"])
+        return issue
+
+
+class PullRequest(Issue):
+    """ A closed pull request, merge data is added after the join. """
+
+    __slots__ = ("merged_at", "merge_commit_sha")
+
+    # like the "pull_request" key of a pull request in the issue listing
+    pull_request = True
+
+
+class Tag(Record):
+    """ A tag with the SHA of the tagged commit. """
+
+    __slots__ = ("name", "sha")
+
+    def __init__(self, name, sha=None):
+        self.name = name
+        self.sha = sha
+
+    @classmethod
+    def from_api(cls, data):
+        """
+        :param dict data: tag from GitHub
+        :rtype: Tag
+        """
+
+        return cls(data["name"], data["commit"]["sha"])
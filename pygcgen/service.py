@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import hashlib
+import hmac
+import json
+import sys
+import threading
+if sys.version_info.major == 3:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+else:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from .generator import Generator
+from .pygcgen_exceptions import ChangelogGeneratorError, GithubApiError
+from .records import Issue, PullRequest
+
+
+DEFAULT_ADDRESS = "127.0.0.1"
+# actions, after which an issue is no longer in the repository
+REMOVING_ACTIONS = ("deleted", "transferred")
+CHANGELOG_PATHS = ("/", "/changelog", "/CHANGELOG.md")
+
+
+class IncrementalGenerator(Generator):
+    """
+    A Generator, that keeps the tags, issues and pull requests in memory
+    after the first run and updates them from webhook events of GitHub.
+
+    Every tag section is generated once and kept, until an event changes
+    an issue or pull request in it. So after an event, only the affected
+    sections are generated again, and the change log is served from
+    memory.
+    """
+
+    def __init__(self, options, session=None):
+        super(IncrementalGenerator, self).__init__(options, session)
+        # (older tag, newer tag[, date]) -> generated section
+        self.sections = {}
+        self.used_sections = set()
+        self.log = None
+        self.log_date = None
+        self.lock = threading.RLock()
+
+    def start(self):
+        """
+        Fetch everything and generate the change log the first time.
+
+        :rtype: str
+        :return: the change log
+        """
+
+        with self.lock:
+            self.used_sections = set()
+            self.log = self.compound_changelog()
+            self.log_date = self.today()
+            return self.log
+
+    def today(self):
+        return datetime.datetime.utcnow().strftime(self.options.date_format)
+
+    def changelog(self):
+        """
+        Get the change log, it's generated again only after a change.
+
+        :rtype: str
+        :return: the change log
+        """
+
+        log = self.log
+        if log is not None and self.log_date == self.today():
+            return log
+        with self.lock:
+            if self.log is None or self.log_date != self.today():
+                self.used_sections = set()
+                self.log = self.render_changelog()
+                self.log_date = self.today()
+                # forget the sections of deleted tags and past days
+                for key in set(self.sections) - self.used_sections:
+                    del self.sections[key]
+            return self.log
+
+    def generate_log_between_tags(self, older_tag, newer_tag):
+        key = (older_tag["name"] if older_tag else None, newer_tag["name"])
+        if newer_tag["name"] == self.options.unreleased_label:
+            # the unreleased section shows the date of today
+            key += (self.get_time_of_tag(newer_tag).strftime(
+                self.options.date_format),)
+        self.used_sections.add(key)
+        if key not in self.sections:
+            self.sections[key] = super(
+                IncrementalGenerator, self
+            ).generate_log_between_tags(older_tag, newer_tag)
+        return self.sections[key]
+
+    def handle_event(self, event, payload):
+        """
+        Update the change log from a webhook event.
+
+        :param str event: Type of the event (X-GitHub-Event header).
+        :param dict payload: Payload of the event.
+        :rtype: list(str)
+        :return: Names of the changed tag sections.
+        """
+
+        removed = payload.get("action") in REMOVING_ACTIONS
+        with self.lock:
+            if event == "issues":
+                items = self.update_issue(payload["issue"], removed)
+            elif event == "pull_request":
+                items = self.update_pull_request(payload["pull_request"])
+            elif event in ("create", "delete") and \
+                    payload.get("ref_type") == "tag":
+                return self.update_tags()
+            else:
+                return []
+            return self.invalidate(items)
+
+    def update_issue(self, data, removed=False):
+        """
+        Replace an issue with its new state.
+
+        :param dict data: Issue from the webhook payload.
+        :param bool removed: True, if the issue was deleted.
+        :rtype: list(Issue)
+        :return: the old and the new issue, as far as they are in the log
+        """
+
+        if "pull_request" in data:
+            # changes of pull requests come with pull_request events
+            return []
+        items = remove_item(self.issues, data["number"])
+        if removed or not self.options.issues or \
+                data.get("state") != "closed":
+            return items
+        issue = Issue.from_api(data)
+        if not self.matches_labels(issue):
+            return items
+        self.fetcher.fetch_events(issue)
+        new = self.detect_actual_closed_dates([issue], "issues")
+        insert_items(self.issues, new)
+        return items + new
+
+    def update_pull_request(self, data):
+        """
+        Replace a pull request with its new state.
+
+        :param dict data: Pull request from the webhook payload.
+        :rtype: list(PullRequest)
+        :return: the old and the new pull request, as far as they are
+                 in the log
+        """
+
+        items = remove_item(self.pull_requests, data["number"])
+        branch = self.options.release_branch
+        if not self.options.include_pull_request or \
+                not data.get("merged_at") or \
+                (branch and data["base"]["ref"] != branch):
+            return items
+        pr = PullRequest.from_api(data)
+        if not self.matches_labels(pr):
+            return items
+        pr['merged_at'] = data['merged_at']
+        pr['merge_commit_sha'] = data.get('merge_commit_sha')
+        if self.options.pr_date_source == "events":
+            self.fetcher.fetch_events(pr)
+        new = self.detect_actual_closed_dates([pr], "pull requests")
+        insert_items(self.pull_requests, new)
+        return items + new
+
+    def update_tags(self):
+        """
+        Fetch the tags again after a tag was created or deleted. The
+        sections between unchanged tags are kept.
+
+        :rtype: list(str)
+        :return: Names of the added and removed tags.
+        """
+
+        names = set(tag["name"] for tag in self.filtered_tags)
+        self.fetch_and_filter_tags()
+        self.filtered_tags = self.sort_tags_by_date(self.filtered_tags)
+        changed = names.symmetric_difference(
+            tag["name"] for tag in self.filtered_tags
+        )
+        log_start = self.log_start
+        added = changed - names
+        if (log_start and (
+                (self.log_start_date() or "") < log_start or
+                (added and self.options.filter_issues_by_milestone))) or \
+                (changed and self.options.date_resolution == "lazy"):
+            # the log starts earlier now, than the issues were fetched for,
+            # the old issues of the milestone of a new tag are missing or
+            # issues closed after a new tag need their exact dates
+            self.fetch_and_filter_issues_and_pr()
+            self.sections.clear()
+        elif any(item.get("milestone") in changed
+                 for item in self.issues + self.pull_requests):
+            # issues move to or from the section of their milestone
+            self.sections.clear()
+        self.log = None
+        return sorted(changed)
+
+    def invalidate(self, items):
+        """
+        Forget the sections, that contain any of the items, by date or
+        by milestone.
+
+        :param list items: Changed issues and pull requests.
+        :rtype: list(str)
+        :return: Names of the changed tag sections.
+        """
+
+        dates = [i["actual_date"] for i in items if i.get("actual_date")]
+        milestones = set(i["milestone"] for i in items if i.get("milestone"))
+        changed = []
+        for key in list(self.sections):
+            older, newer = key[:2]
+            older_time = self.tag_times_dict.get(older)
+            newer_time = self.tag_times_dict.get(newer)
+            # the unreleased section has no end, its time is the one of
+            # the last render
+            unreleased = newer == self.options.unreleased_label
+            if newer in milestones or any(
+                    older_time is None or newer_time is None or
+                    older_time < date and (unreleased or date <= newer_time)
+                    for date in dates):
+                del self.sections[key]
+                changed.append(newer)
+        if items:
+            self.log = None
+        return changed
+
+
+def remove_item(items, number):
+    """
+    :param list items: Issues or pull requests.
+    :param int number: Number of the issue to remove.
+    :rtype: list
+    :return: the removed issue, if it was there
+    """
+
+    for index, item in enumerate(items):
+        if item["number"] == number:
+            return [items.pop(index)]
+    return []
+
+
+def insert_items(items, new):
+    """
+    Insert issues in the order of the issue listing (newest first).
+
+    :param list items: Issues or pull requests, newest first.
+    :param list new: Issues to insert.
+    """
+
+    for item in new:
+        index = 0
+        while index < len(items) and items[index]["number"] > item["number"]:
+            index += 1
+        items.insert(index, item)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """
+    GET / returns the change log, POST with a webhook event of GitHub
+    (issues, pull_request, create and delete of tags) updates it.
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in CHANGELOG_PATHS:
+            return self.respond(404, {"message": "Not Found"})
+        body = self.server.generator.changelog().encode("utf-8")
+        self.respond(200, body, "text/markdown; charset=utf-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if not self.server.verify(body,
+                                  self.headers.get("X-Hub-Signature-256")):
+            return self.respond(401, {"message": "Bad signature"})
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except ValueError:
+            return self.respond(400, {"message": "Payload isn't JSON"})
+        event = self.headers.get("X-GitHub-Event")
+        generator = self.server.generator
+        repo = (payload.get("repository") or {}).get("full_name")
+        if repo and repo.lower() != "{0}/{1}".format(
+                generator.options.user, generator.options.project).lower():
+            return self.respond(200, {"event": event, "ignored": repo})
+        try:
+            sections = generator.handle_event(event, payload)
+        except (ChangelogGeneratorError, GithubApiError) as err:
+            return self.respond(502, {"message": str(err)})
+        self.respond(200, {"event": event, "sections": sections})
+
+    def respond(self, status, body, content_type="application/json"):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class ChangelogServer(ThreadingMixIn, HTTPServer):
+    """ HTTP server of an IncrementalGenerator. """
+
+    daemon_threads = True
+
+    def __init__(self, address, generator, secret=None, verbose=0):
+        """
+        :param tuple address: Host and port to listen on.
+        :param IncrementalGenerator generator: Generator, already started.
+        :param str secret: Secret of the webhook, to check the signature
+                           of the events.
+        :param int verbose: Verbosity level.
+        """
+
+        HTTPServer.__init__(self, address, WebhookHandler)
+        self.generator = generator
+        self.secret = secret
+        self.verbose = verbose
+
+    def verify(self, body, signature):
+        """
+        Check the signature (X-Hub-Signature-256) of a webhook event.
+
+        :param bytes body: Payload of the event.
+        :param str signature: Value of the signature header.
+        :rtype: bool
+        """
+
+        if not self.secret:
+            return True
+        if not signature:
+            return False
+        expected = "sha256=" + hmac.new(
+            self.secret.encode("utf-8"), body, hashlib.sha256
+        ).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+
+def parse_address(address):
+    """
+    :param str address: [HOST:]PORT
+    :rtype: str, int
+    """
+
+    host, _, port = str(address).rpartition(":")
+    return host or DEFAULT_ADDRESS, int(port)
+
+
+def serve(options):
+    """
+    Generate the change log, then keep it up to date from webhook events
+    and serve it over HTTP, until interrupted.
+
+    :param options: parsed command line options
+    """
+
+    generator = IncrementalGenerator(options)
+    if not options.quiet:
+        print("Generating changelog...")
+    generator.start()
+    server = ChangelogServer(parse_address(options.serve), generator,
+                             options.webhook_secret, options.verbose)
+    if not options.quiet:
+        print("Serving the changelog on http://{0}:{1}/".format(
+            *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        generator.session.close()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+if sys.version_info.major == 3:
+    from builtins import object
+
+from .archive import TrafficArchive
+from .cache import ResponseCache
+from .governor import RateLimitGovernor
+from .transport import github_client
+
+
+GH_CFG_VARS = ["github.pygcgen.token", "github.token"]
+CHANGELOG_GITHUB_TOKEN = "CHANGELOG_GITHUB_TOKEN"
+NO_TOKEN_PROVIDED = \
+    "Warning: No token provided. Neither -t option, git config or variable " \
+    "$CHANGELOG_GITHUB_TOKEN found. This script can make only " \
+    "50 requests to GitHub API per hour without token!"
+
+
+def fetch_github_token(token=None):
+    """
+    Fetch GitHub token. First try to use the token provided by --token
+    option, otherwise try to fetch it from git config and last
+    CHANGELOG_GITHUB_TOKEN env variable.
+
+    :param str token: Token given by the --token option.
+    :rtype: str
+    :return: the token or None, if none was found
+    """
+
+    if not token:
+        try:
+            for v in GH_CFG_VARS:
+                cmd = ['git', 'config', '--get', '{0}'.format(v)]
+                token = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE).communicate()[0].strip()
+                if token:
+                    break
+        except (subprocess.CalledProcessError, WindowsError):
+            pass
+    if not token:
+        token = os.environ.get(CHANGELOG_GITHUB_TOKEN)
+    if not token:
+        print(NO_TOKEN_PROVIDED)
+    if isinstance(token, bytes):
+        token = token.decode("utf8")
+    return token or None
+
+
+class Session(object):
+    """
+    Everything the requests of a run share: the GitHub token, the worker
+    pool, the rate limit governor, the response cache, the archive of
+    --record/--replay and the keep-alive connections of the workers.
+
+    A generator creates a session of its own, unless it is given one.
+    In batch mode the generators of all repositories share a session,
+    so their requests are scheduled together within one rate limit.
+    """
+
+    def __init__(self, options):
+        """
+        :param options: parsed command line options, the token, request,
+                        cache and archive options are used
+        """
+
+        self.token = fetch_github_token(options.token)
+        # one pool of workers for all simultaneous requests
+        self.executor = ThreadPoolExecutor(
+            max_workers=options.max_simultaneous_requests
+        )
+        self.governor = RateLimitGovernor(
+            options.max_simultaneous_requests, verbose=options.verbose
+        )
+        self.archive = None
+        if options.record or options.replay:
+            self.archive = TrafficArchive(options.replay or options.record,
+                                          replay=bool(options.replay))
+            if options.verbose > 1 and options.replay:
+                print("Replaying {0} responses from {1}".format(
+                    self.archive.count(), options.replay))
+        self.cache = None
+        # the archive has to hold complete responses, not cached ones
+        if options.cache_dir and not self.archive:
+            self.cache = ResponseCache(
+                options.cache_dir, options.cache_max_size * 1024 * 1024
+            )
+        self.local = threading.local()
+
+    def github(self, api_url, token=None):
+        """
+        GitHub client for the current thread. A client remembers the
+        headers of its last response and keeps its connection open, so
+        threads can't share one. Generators of the same session share
+        the clients (and connections) of a thread.
+
+        :param str api_url: Endpoint of the GitHub API.
+        :param str token: GitHub token.
+        :rtype: GitHub
+        """
+
+        clients = getattr(self.local, "clients", None)
+        if clients is None:
+            clients = self.local.clients = {}
+        gh = clients.get((api_url, token))
+        if gh is None:
+            gh = clients[(api_url, token)] = github_client(api_url, token)
+        return gh
+
+    def save_archive(self):
+        """ Finish writing the archive of the requests (--record). """
+
+        if self.archive:
+            self.archive.close()
+
+    def close(self):
+        """ Finish the archive and stop the workers. """
+
+        self.save_archive()
+        self.executor.shutdown()
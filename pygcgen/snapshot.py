@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import sys
+if sys.version_info.major == 3:
+    from builtins import object
+
+from .files import write_atomic
+
+
+SNAPSHOT_VERSION = 2
+
+
+def listing_order(issue):
+    """ Sort key for the default order of GitHub listings (newest first). """
+    return issue["created_at"], issue["number"]
+
+
+class Snapshot(object):
+    """
+    Local snapshot of the closed issues and pull requests of a repository,
+    used for incremental syncing.
+
+    Besides the issues and pull requests, the snapshot keeps the time of
+    the last sync (newest "updated_at" seen) and the events of issues,
+    so those are only fetched again for changed issues.
+    """
+
+    def __init__(self, path, repo):
+        """
+        :param str path: File to store the snapshot in.
+        :param str repo: Identifier of the repository (api/user/project).
+        """
+
+        self.path = path
+        self.repo = repo
+        self.issues = []
+        self.issues_synced_at = None
+        self.pulls = []
+        self.pulls_synced_at = None
+        self.pulls_base = None
+        self.events = {}
+        self.load()
+
+    def load(self):
+        """ Load the snapshot, if the file exists and matches the repo. """
+
+        try:
+            with open(self.path, "rb") as fh:
+                data = json.loads(fh.read().decode("utf-8"))
+        except (IOError, OSError, ValueError):
+            return
+        if data.get("version") != SNAPSHOT_VERSION or \
+                data.get("repo") != self.repo:
+            return
+        self.issues = data["issues"]
+        self.issues_synced_at = data["issues_synced_at"]
+        self.pulls = data["pulls"]
+        self.pulls_synced_at = data["pulls_synced_at"]
+        self.pulls_base = data["pulls_base"]
+        self.events = data["events"]
+
+    def save(self):
+        """ Write the snapshot to disk. """
+
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "repo": self.repo,
+            "issues": self.issues,
+            "issues_synced_at": self.issues_synced_at,
+            "pulls": self.pulls,
+            "pulls_synced_at": self.pulls_synced_at,
+            "pulls_base": self.pulls_base,
+            "events": self.events,
+        }
+        write_atomic(self.path, json.dumps(data).encode("utf-8"))
+
+    def merge_issues(self, updated):
+        """
+        Merge issues updated since the last sync into the snapshot.
+        Issues, that are open again, are removed. Stored events of
+        changed issues are dropped, so they will be fetched again.
+
+        :param list(dict) updated: Issues updated since the last sync.
+        :rtype: list(dict)
+        :return: All closed issues and pull requests of the snapshot.
+        """
+
+        by_number = dict((i["number"], i) for i in self.issues)
+        for issue in updated:
+            key = str(issue["number"])
+            old = by_number.get(issue["number"])
+            if old is None or old["updated_at"] != issue["updated_at"]:
+                self.events.pop(key, None)
+            if issue["state"] == "closed":
+                by_number[issue["number"]] = issue
+            else:
+                by_number.pop(issue["number"], None)
+            if not self.issues_synced_at or \
+                    issue["updated_at"] > self.issues_synced_at:
+                self.issues_synced_at = issue["updated_at"]
+        self.issues = sorted(by_number.values(), key=listing_order,
+                             reverse=True)
+        return self.issues
+
+    def merge_pulls(self, updated, base):
+        """
+        Merge closed pull requests updated since the last sync
+        into the snapshot.
+
+        :param list(dict) updated: Pull requests updated since the last sync.
+        :param str base: Branch the pull requests were fetched for.
+        :rtype: list(dict)
+        :return: All closed pull requests of the snapshot.
+        """
+
+        if base != self.pulls_base:
+            self.pulls = []
+            self.pulls_synced_at = None
+            self.pulls_base = base
+        by_number = dict((p["number"], p) for p in self.pulls)
+        for pr in updated:
+            by_number[pr["number"]] = pr
+            if not self.pulls_synced_at or \
+                    pr["updated_at"] > self.pulls_synced_at:
+                self.pulls_synced_at = pr["updated_at"]
+        self.pulls = sorted(by_number.values(), key=listing_order,
+                            reverse=True)
+        return self.pulls
+
+    def get_events(self, number):
+        return self.events.get(str(number))
+
+    def set_events(self, number, events):
+        self.events[str(number)] = events
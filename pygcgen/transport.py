@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+
+import socket
+import sys
+from collections import namedtuple
+if sys.version_info.major == 3:
+    from builtins import object
+    from http.client import HTTPException
+else:
+    from httplib import HTTPException
+
+from agithub.GitHub import GitHub, GitHubClient
+
+
+# A response of GitHub: status code, (JSON) data and list of headers.
+# Each request returns its own, so simultaneous requests don't mix up
+# their headers (e.g. the Link header for paging).
+Response = namedtuple("Response", ["status", "data", "headers"])
+
+
+class BufferedResponse(object):
+    """
+    A response with the body already read, so the connection is free
+    for the next request and the size of the body is known.
+    """
+
+    def __init__(self, response):
+        self.status = response.status
+        self.headers = response.getheaders()
+        self.body = response.read()
+
+    def read(self):
+        return self.body
+
+    def getheader(self, name, default=None):
+        for key, value in self.headers:
+            if key.lower() == name.lower():
+                return value
+        return default
+
+    def getheaders(self):
+        return self.headers
+
+
+class KeepAliveConnection(object):
+    """
+    A HTTP(S) connection, that stays open for the next request.
+
+    agithub closes the connection after each request, that is ignored
+    here. If GitHub closed the connection in the meantime, the request
+    is sent again on a new connection.
+    """
+
+    def __init__(self, connect):
+        """
+        :param connect: Function returning a new HTTP(S)Connection.
+        """
+
+        self.connect = connect
+        self.conn = None
+        self.pending = None
+        # size of the body of the last response
+        self.last_size = 0
+
+    def request(self, method, url, body=None, headers=None):
+        # sent in getresponse(), to be able to send it again
+        self.pending = (method, url, body, headers or {})
+
+    def getresponse(self):
+        reused = self.conn is not None
+        try:
+            response = self.send()
+        except (HTTPException, socket.error):
+            self.shutdown()
+            if not reused:
+                raise
+            # the server closed the idle connection, use a new one
+            response = self.send()
+        self.last_size = len(response.body)
+        return response
+
+    def send(self):
+        if self.conn is None:
+            self.conn = self.connect()
+        self.conn.request(*self.pending)
+        return BufferedResponse(self.conn.getresponse())
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        """ Really close the connection. """
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class KeepAliveGitHubClient(GitHubClient):
+    """ agithub client reusing its connection for all requests. """
+
+    def __init__(self, *args, **kwargs):
+        super(KeepAliveGitHubClient, self).__init__(*args, **kwargs)
+        self.connection = None
+
+    def get_connection(self):
+        if self.connection is None:
+            self.connection = KeepAliveConnection(
+                super(KeepAliveGitHubClient, self).get_connection
+            )
+        return self.connection
+
+    def last_response_size(self):
+        """ Bytes received with the last response. """
+        return self.connection.last_size if self.connection else 0
+
+
+def github_client(api_url, token=None):
+    """
+    Create a GitHub client with a keep-alive connection. A client can
+    only be used by one thread at a time.
+
+    :param str api_url: Endpoint of the GitHub API.
+    :param str token: GitHub token.
+    :rtype: GitHub
+    """
+
+    gh = GitHub(token=token, api_url=api_url)
+    props = gh.client.prop
+    # the rate limit is handled by the RateLimitGovernor
+    gh.setClient(KeepAliveGitHubClient(sleep_on_ratelimit=False))
+    gh.setConnectionProperties(props)
+    return gh
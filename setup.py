@@ -54,7 +54,9 @@ setup(
 
     url=version['__uri__'],
 
-    install_requires=["agithub", "python-dateutil"],
+    install_requires=[
+        "agithub", "python-dateutil", 'futures; python_version < "3"'
+    ],
 
     packages=[version['__title__']],
     # data_files=[